@@ -5,6 +5,7 @@
 # @QQ:1041264242
 # 注意事项：
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from app.core.config import settings
 
 # 创建Celery实例
@@ -29,5 +30,25 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+
+@worker_init.connect
+def ensure_neo4j_schema(**kwargs):
+    """worker主进程启动时创建并校验Neo4j索引"""
+    if settings.GRAPH_BACKEND != "neo4j" or not settings.NEO4J_ENSURE_SCHEMA:
+        return
+    from app.core.neo4j_schema import ensure_schema
+    try:
+        ensure_schema()
+    except Exception as e:
+        print(f"Neo4j索引创建失败: {e}")
+
+
+@worker_process_init.connect
+def preload_keyword_index(**kwargs):
+    """worker进程启动时预加载关键词索引，避免第一个任务承担加载耗时"""
+    from app.utils.keyword_index import get_keyword_index
+    get_keyword_index()
+
+
 if __name__ == "__main__":
     celery_app.start()
\ No newline at end of file
@@ -30,6 +30,101 @@ class Settings(BaseSettings):
     # ArXiv API配置
     ARXIV_MAX_RESULTS: int = 10
     ARXIV_TIMEOUT: int = 30
+    # 论文检索后端: online(实时调用arXiv API) / offline(本地元数据镜像)
+    ARXIV_BACKEND: str = "online"
+    ARXIV_MIRROR_PATH: str = "data/arxiv_mirror"
+    # 按ID批量查询arXiv时每次请求的ID数量（受GET请求URL长度限制）
+    ARXIV_ID_BATCH_SIZE: int = 100
+    # 下载前重排序：按 max_paper_num * RERANK_OVERFETCH 超量检索候选论文
+    RERANK_OVERFETCH: int = 3
+    RERANK_RELATED_WEIGHT: float = 0.5
+    
+    # PDF下载配置
+    # 竞速模式同时启动的下载源数量，小于2时按顺序逐个尝试
+    PDF_DOWNLOAD_RACE: int = 0
+    # 批量下载的全局并发数
+    PDF_DOWNLOAD_WORKERS: int = 4
+    # 各主机的并发连接上限（按域名后缀匹配），未列出的主机使用PDF_HOST_DEFAULT_LIMIT
+    PDF_HOST_LIMITS: dict = {
+        "arxiv.org": 2,
+        "export.arxiv.org": 1,
+        "api.unpaywall.org": 4,
+        "api.crossref.org": 4,
+        "scholar.google.com": 1,
+        "sci-hub": 2,
+    }
+    PDF_HOST_DEFAULT_LIMIT: int = 4
+    # 流式下载的(连接超时, 读取超时)秒数与断点续传重试次数
+    PDF_DOWNLOAD_TIMEOUT: tuple = (10, 60)
+    PDF_DOWNLOAD_RETRIES: int = 2
+    # 下载后用mmap做PDF结构校验（%%EOF、startxref、页面树），校验失败立即尝试下一个下载源
+    PDF_STRUCTURAL_CHECK: bool = True
+    # 下载源熔断：连续失败次数阈值与冷却秒数；(论文, 下载源)负缓存的有效期与容量
+    SOURCE_FAILURE_THRESHOLD: int = 5
+    SOURCE_COOLDOWN: int = 300
+    NEGATIVE_CACHE_TTL: int = 6 * 3600
+    NEGATIVE_CACHE_SIZE: int = 10000
+    # 下载源成功率/耗时统计文件，为空时使用 OUTPUT_PATH/source_stats.json
+    SOURCE_STATS_PATH: str = ""
+    # 全局内容寻址PDF仓库，路径为空时使用 OUTPUT_PATH/pdf_store
+    PDF_STORE_ENABLED: bool = True
+    PDF_STORE_PATH: str = ""
+    PDF_STORE_MAX_BYTES: int = 20 * 1024 ** 3
+    # MinerU转换：并发线程数、状态轮询的初始/最大间隔（秒）、单个任务的超时时间（秒）
+    MINERU_MAX_WORKERS: int = 4
+    MINERU_POLL_INITIAL: float = 1.0
+    MINERU_POLL_MAX: float = 30.0
+    MINERU_TASK_TIMEOUT: int = 1800
+    # MinerU凭证池：每个密钥的并发任务上限，连续出错多少次后暂停该密钥及暂停秒数
+    MINERU_KEY_MAX_IN_FLIGHT: int = 2
+    MINERU_KEY_FAILURE_THRESHOLD: int = 3
+    MINERU_KEY_COOLDOWN: int = 300
+    # PDF转Markdown结果缓存（按PDF的SHA-256+转换器版本），路径为空时使用 OUTPUT_PATH/conversion_cache
+    CONVERSION_CACHE_ENABLED: bool = True
+    CONVERSION_CACHE_PATH: str = ""
+    CONVERSION_CACHE_MAX_BYTES: int = 2 * 1024 ** 3
+    # MinerU结果为ZIP时在内存中解压，超过该大小才落到临时文件；是否同时解压图片
+    ZIP_SPOOL_MAX_BYTES: int = 64 * 1024 ** 2
+    MINERU_EXTRACT_IMAGES: bool = False
+    # PDF转Markdown方式：mineru / local / fallback（MinerU失败时用本地引擎）/ fast（短论文直接用本地引擎）
+    PDF2MD_MODE: str = "fallback"
+    PDF2MD_FAST_PATH_MAX_PAGES: int = 12
+    # 本地转换引擎的进程数，0表示CPU核数；等待单个PDF转换结果的最长秒数，0表示不限
+    LOCAL_PDF2MD_WORKERS: int = 0
+    LOCAL_PDF2MD_TIMEOUT: int = 300
+    # 论文压缩：超过该token数（估算）的论文按章节分块压缩后合并；分块压缩的并发调用数
+    COMPRESSION_CHUNK_TOKENS: int = 12000
+    COMPRESSION_WORKERS: int = 4
+    # 论文处理流水线（下载→转换→压缩）：各阶段工作线程数、阶段队列容量、队列深度输出间隔（秒）
+    PIPELINE_DOWNLOAD_WORKERS: int = 4
+    PIPELINE_CONVERT_WORKERS: int = 4
+    PIPELINE_COMPRESS_WORKERS: int = 2
+    PIPELINE_QUEUE_SIZE: int = 8
+    PIPELINE_REPORT_INTERVAL: float = 10.0
+    # 论文压缩结果缓存（按论文、压缩提示版本、模型），路径为空时使用 OUTPUT_PATH/summary_cache；有效期（秒），0表示不过期
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_PATH: str = ""
+    SUMMARY_CACHE_MAX_BYTES: int = 512 * 1024 ** 2
+    SUMMARY_CACHE_TTL: int = 90 * 24 * 3600
+    # 关键词出现次数内存索引：增量刷新间隔与全量重建间隔（秒），分页读取Words节点的每页数量
+    KEYWORD_INDEX_ENABLED: bool = True
+    KEYWORD_INDEX_REFRESH_INTERVAL: float = 300.0
+    KEYWORD_INDEX_FULL_RELOAD_INTERVAL: float = 6 * 3600.0
+    KEYWORD_INDEX_BATCH_SIZE: int = 50000
+    # Wikidata/Wikipedia请求的(连接超时, 读取超时)秒数，失败重试次数与指数退避的初始/最长等待秒数
+    WIKI_TIMEOUT: tuple = (5, 20)
+    WIKI_MAX_RETRIES: int = 4
+    WIKI_RETRY_BACKOFF: float = 1.0
+    WIKI_RETRY_MAX_WAIT: float = 30.0
+    # 关键词综合得分 = importance_score * 重要度权重 + 归一化count * 出现次数权重
+    KEYWORD_WEIGHT_IMPORTANCE: float = 0.4
+    KEYWORD_WEIGHT_COUNT: float = 0.6
+    # 关键词图谱后端: neo4j / sqlite（嵌入式，GRAPH_SQLITE_PATH为":memory:"时纯内存；库为空且配置了GRAPH_CSV_PATH时从CSV加载）
+    GRAPH_BACKEND: str = "neo4j"
+    GRAPH_SQLITE_PATH: str = "data/words_graph.sqlite"
+    GRAPH_CSV_PATH: str = ""
+    # celery worker启动时创建并校验Words的range索引和全文索引
+    NEO4J_ENSURE_SCHEMA: bool = True
     
     # 日志配置
     LOG_LEVEL: str = "INFO"
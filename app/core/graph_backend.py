@@ -0,0 +1,375 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/19 15:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：关键词图谱后端。
+# 关键词打分只需要Words节点的 名称/别名 -> 出现次数，由GraphBackend统一提供：
+#   neo4j  —— 查询线上Neo4j（range索引 + 全文索引，见app.core.neo4j_schema）
+#   sqlite —— 嵌入式SQLite（GRAPH_SQLITE_PATH，":memory:"为纯内存），从CSV导出文件加载，
+#             用于本地测试、压测，或不部署Neo4j的小规模环境
+# 通过GRAPH_BACKEND选择。CSV至少包含name、other、count三列，可选id（或Neo4j导出的_id）列。
+#
+# 从Neo4j导出: python -m app.core.graph_backend export words.csv
+# 导入SQLite:  python -m app.core.graph_backend load words.csv --db data/words_graph.sqlite
+# 查询:        python -m app.core.graph_backend lookup transformer "dark matter"
+
+import abc
+import argparse
+import csv
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+from app.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+_ALIAS_PATTERN = re.compile(r"'([^']*)'")
+
+# SQLite单条语句的参数个数上限为999，按此分批
+_SQLITE_BATCH = 500
+
+
+def parse_aliases(other):
+    """
+    解析Words节点的other属性
+
+    Args:
+        other: 别名列表，或形如 "['a', 'b']" 的字符串
+
+    Returns:
+        list: 别名列表
+    """
+    if not other:
+        return []
+    if isinstance(other, (list, tuple)):
+        return [str(alias) for alias in other]
+    return _ALIAS_PATTERN.findall(str(other))
+
+
+class GraphBackend(abc.ABC):
+    """关键词图谱后端接口"""
+
+    @abc.abstractmethod
+    def keyword_counts(self, entities):
+        """
+        批量查询关键词的出现次数：名称完全匹配，或是某个节点的别名；多个节点匹配时取最大值
+
+        Args:
+            entities (list): 关键词列表
+
+        Returns:
+            dict: 关键词 -> 出现次数，未找到为0
+        """
+
+    def keyword_count(self, entity):
+        """
+        查询单个关键词的出现次数
+
+        Args:
+            entity (str): 关键词
+
+        Returns:
+            int: 出现次数，未找到为0
+        """
+        return self.keyword_counts([entity]).get(entity, 0)
+
+    @abc.abstractmethod
+    def words_page(self, after, limit):
+        """
+        按节点ID分页读取Words节点
+
+        Args:
+            after (int): 只返回ID大于after的节点
+            limit (int): 最多返回的节点数
+
+        Returns:
+            list: 按ID升序的 [{"id", "name", "other", "count"}]
+        """
+
+
+# 名称走range索引；别名先用全文索引按短语召回候选节点，再用CONTAINS条件精确过滤
+KEYWORD_COUNT_QUERY = """
+UNWIND $entities AS row
+CALL {
+    WITH row
+    MATCH (n:Words) WHERE n.name = row.entity
+    RETURN n.count AS count
+    UNION
+    WITH row
+    CALL db.index.fulltext.queryNodes($index, row.query) YIELD node
+    WHERE node.other CONTAINS "'" + row.entity + "'"
+    RETURN node.count AS count
+}
+RETURN row.entity AS entity, coalesce(max(count), 0) AS count
+"""
+
+# 全文索引不可用时的回退查询：逐个节点扫描
+KEYWORD_COUNT_SCAN_QUERY = """
+UNWIND $entities AS row
+OPTIONAL MATCH (n:Words)
+WHERE n.other CONTAINS "'" + row.entity + "'" OR n.name = row.entity
+RETURN row.entity AS entity, coalesce(max(n.count), 0) AS count
+"""
+
+# 全文索引不存在或尚未上线时Neo4j错误信息中的片段（如 "There is no such fulltext schema index"）
+_MISSING_INDEX_MESSAGES = ("no such fulltext schema index", "no such index", "not online", "still populating")
+
+WORDS_PAGE_QUERY = """
+MATCH (n:Words)
+WHERE id(n) > $after
+RETURN id(n) AS id, n.name AS name, n.other AS other, n.count AS count
+ORDER BY id
+LIMIT $limit
+"""
+
+
+def keyword_query_rows(entities):
+    """
+    生成Neo4j关键词查询的参数：每个关键词及其Lucene短语查询
+
+    Args:
+        entities (list): 关键词列表
+
+    Returns:
+        list: [{"entity", "query"}]
+    """
+    from app.core.neo4j_schema import lucene_phrase
+
+    return [{'entity': entity, 'query': lucene_phrase(entity)} for entity in dict.fromkeys(entities) if entity]
+
+
+class Neo4jGraphBackend(GraphBackend):
+    """基于Neo4j的后端"""
+
+    def __init__(self, graph):
+        """
+        Args:
+            graph: py2neo的Graph连接
+        """
+        self.graph = graph
+
+    def keyword_counts(self, entities):
+        from app.core.neo4j_schema import WORDS_FULLTEXT_INDEX
+
+        counts = dict.fromkeys(entities, 0)
+        rows = keyword_query_rows(entities)
+        if not rows:
+            return counts
+        try:
+            records = self.graph.run(KEYWORD_COUNT_QUERY, entities=rows, index=WORDS_FULLTEXT_INDEX).data()
+        except Exception as e:
+            # 只有索引缺失时才回退到扫描查询，连接失败、超时等其他错误照常抛出
+            message = str(e).lower()
+            if not any(fragment in message for fragment in _MISSING_INDEX_MESSAGES):
+                raise
+            logger.warning(f"全文索引查询失败，改为扫描查询（可执行 python -m app.core.neo4j_schema ensure 创建索引）: {e}")
+            records = self.graph.run(KEYWORD_COUNT_SCAN_QUERY, entities=rows).data()
+        counts.update((record['entity'], record['count']) for record in records)
+        return counts
+
+    def words_page(self, after, limit):
+        return self.graph.run(WORDS_PAGE_QUERY, after=after, limit=limit).data()
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS words (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    other TEXT,
+    count INTEGER
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT NOT NULL,
+    word_id INTEGER NOT NULL,
+    count INTEGER
+);
+CREATE INDEX IF NOT EXISTS terms_term ON terms(term);
+"""
+
+
+class SQLiteGraphBackend(GraphBackend):
+    """嵌入式SQLite后端，名称和别名展开到terms表并建索引"""
+
+    def __init__(self, path=":memory:"):
+        """
+        Args:
+            path (str): 数据库文件路径，":memory:"表示纯内存
+        """
+        self.path = path
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._lock = threading.Lock()
+
+    def word_total(self):
+        """
+        Returns:
+            int: Words节点数
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+
+    def add_words(self, records):
+        """
+        写入Words节点
+
+        Args:
+            records (iterable): [{"name", "other", "count"}]，可带"id"
+
+        Returns:
+            int: 写入的节点数
+        """
+        added = 0
+        with self._lock, self._conn:
+            for record in records:
+                other = record.get('other')
+                if isinstance(other, (list, tuple)):
+                    other = str(list(other))
+                count = record.get('count')
+                count = int(count) if count not in (None, "") else None
+                cursor = self._conn.execute("INSERT OR REPLACE INTO words(id, name, other, count) VALUES(?, ?, ?, ?)",
+                                            (record.get('id'), record.get('name'), other, count))
+                word_id = cursor.lastrowid
+                self._conn.execute("DELETE FROM terms WHERE word_id = ?", (word_id,))
+                terms = dict.fromkeys(term for term in [record.get('name'), *parse_aliases(other)] if term)
+                self._conn.executemany("INSERT INTO terms(term, word_id, count) VALUES(?, ?, ?)",
+                                       [(term, word_id, count) for term in terms])
+                added += 1
+        return added
+
+    def load_csv(self, csv_path, replace=True):
+        """
+        从CSV导出文件加载Words节点
+
+        Args:
+            csv_path (str): CSV文件路径
+            replace (bool): 是否先清空已有数据
+
+        Returns:
+            int: 加载的节点数
+        """
+        if replace:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM words")
+                self._conn.execute("DELETE FROM terms")
+
+        def rows():
+            with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    word_id = row.get('id') or row.get('_id')
+                    yield {'id': int(word_id) if word_id else None, 'name': row.get('name'),
+                           'other': row.get('other'), 'count': row.get('count')}
+
+        added = self.add_words(rows())
+        logger.info(f"已从 {csv_path} 加载 {added} 个Words节点到 {self.path}")
+        return added
+
+    def keyword_counts(self, entities):
+        counts = dict.fromkeys(entities, 0)
+        terms = [entity for entity in dict.fromkeys(entities) if entity]
+        with self._lock:
+            for i in range(0, len(terms), _SQLITE_BATCH):
+                batch = terms[i:i + _SQLITE_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                counts.update(self._conn.execute(
+                    f"SELECT term, COALESCE(MAX(count), 0) FROM terms WHERE term IN ({placeholders}) GROUP BY term",
+                    batch).fetchall())
+        return counts
+
+    def words_page(self, after, limit):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, other, count FROM words WHERE id > ? ORDER BY id LIMIT ?",
+                                      (after, limit)).fetchall()
+        return [{'id': word_id, 'name': name, 'other': other, 'count': count} for word_id, name, other, count in rows]
+
+
+def export_csv(backend, csv_path, batch_size=50000):
+    """
+    把后端中的Words节点导出为CSV（可再用load_csv加载）
+
+    Args:
+        backend (GraphBackend): 数据来源
+        csv_path (str): CSV文件路径
+        batch_size (int): 分页大小
+
+    Returns:
+        int: 导出的节点数
+    """
+    exported, after = 0, -1
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=["id", "name", "other", "count"])
+        writer.writeheader()
+        while True:
+            records = backend.words_page(after, batch_size)
+            for record in records:
+                other = record['other']
+                writer.writerow({**record, 'other': str(list(other)) if isinstance(other, (list, tuple)) else other})
+            exported += len(records)
+            if len(records) < batch_size:
+                return exported
+            after = records[-1]['id']
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_graph_backend():
+    """
+    获取全局图谱后端（GRAPH_BACKEND）
+
+    Returns:
+        GraphBackend: 后端实例
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.GRAPH_BACKEND == "sqlite":
+                backend = SQLiteGraphBackend(settings.GRAPH_SQLITE_PATH)
+                if settings.GRAPH_CSV_PATH and not backend.word_total():
+                    backend.load_csv(settings.GRAPH_CSV_PATH)
+            elif settings.GRAPH_BACKEND == "neo4j":
+                from app.core.config import graph
+
+                backend = Neo4jGraphBackend(graph)
+            else:
+                raise ValueError(f"未知的图谱后端: {settings.GRAPH_BACKEND}")
+            _backend = backend
+        return _backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词图谱后端")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="把Neo4j中的Words节点导出为CSV")
+    export_parser.add_argument("csv_path", help="CSV文件路径")
+    load_parser = subparsers.add_parser("load", help="把CSV加载到SQLite")
+    load_parser.add_argument("csv_path", help="CSV文件路径")
+    load_parser.add_argument("--db", default=None, help="SQLite路径，默认读取配置GRAPH_SQLITE_PATH")
+    lookup_parser = subparsers.add_parser("lookup", help="用当前后端查询关键词的出现次数")
+    lookup_parser.add_argument("entities", nargs="+", help="关键词")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "export":
+        from app.core.config import graph
+
+        print(f"已导出 {export_csv(Neo4jGraphBackend(graph), args.csv_path)} 个Words节点")
+    elif args.command == "load":
+        backend = SQLiteGraphBackend(args.db or settings.GRAPH_SQLITE_PATH)
+        print(f"已加载 {backend.load_csv(args.csv_path)} 个Words节点")
+    elif args.command == "lookup":
+        counts = get_graph_backend().keyword_counts(args.entities)
+        for entity in args.entities:
+            print(f"{entity}\t{counts[entity]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/19 10:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：Neo4j索引管理。
+# Words节点需要两个索引：name上的range索引（名称精确匹配），other/name上的全文索引（别名检索）；
+# 没有索引时 SearchKeyWordScore 的每次查询都要扫描全部Words节点。
+# celery worker启动时自动创建（NEO4J_ENSURE_SCHEMA），也可手动执行：
+#
+# 创建并校验: python -m app.core.neo4j_schema ensure
+# 查看索引:   python -m app.core.neo4j_schema show
+# 执行计划:   python -m app.core.neo4j_schema explain transformer "dark matter"
+
+import argparse
+import logging
+import re
+
+from app.core.config import graph
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+WORDS_NAME_INDEX = "words_name_range"
+WORDS_FULLTEXT_INDEX = "words_other_fulltext"
+
+SCHEMA_STATEMENTS = (
+    f"CREATE INDEX {WORDS_NAME_INDEX} IF NOT EXISTS FOR (n:Words) ON (n.name)",
+    f"CREATE FULLTEXT INDEX {WORDS_FULLTEXT_INDEX} IF NOT EXISTS FOR (n:Words) ON EACH [n.other, n.name]",
+)
+
+# 期望的索引：名称 -> 类型
+EXPECTED_INDEXES = {
+    WORDS_NAME_INDEX: "RANGE",
+    WORDS_FULLTEXT_INDEX: "FULLTEXT",
+}
+
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+
+def escape_lucene(text):
+    """
+    转义Lucene查询语法中的特殊字符
+
+    Args:
+        text (str): 原始文本
+
+    Returns:
+        str: 转义后的文本
+    """
+    return _LUCENE_SPECIAL.sub(r'\\\1', text)
+
+
+def lucene_phrase(text):
+    """
+    生成匹配整个短语的Lucene查询
+
+    Args:
+        text (str): 短语
+
+    Returns:
+        str: 查询字符串
+    """
+    return f'"{escape_lucene(text)}"'
+
+
+def show_indexes():
+    """
+    列出Words标签上的索引
+
+    Returns:
+        list: [{"name", "type", "properties", "state"}]
+    """
+    return graph.run("SHOW INDEXES YIELD name, type, labelsOrTypes, properties, state "
+                     "WHERE 'Words' IN labelsOrTypes "
+                     "RETURN name, type, properties, state").data()
+
+
+def verify_schema():
+    """
+    校验期望的索引是否存在且已上线
+
+    Returns:
+        list: 问题描述列表，为空表示校验通过
+    """
+    indexes = {index['name']: index for index in show_indexes()}
+    problems = []
+    for name, index_type in EXPECTED_INDEXES.items():
+        index = indexes.get(name)
+        if index is None:
+            problems.append(f"缺少索引 {name}")
+        elif index['type'] != index_type:
+            problems.append(f"索引 {name} 类型为 {index['type']}，应为 {index_type}")
+        elif index['state'] != "ONLINE":
+            problems.append(f"索引 {name} 状态为 {index['state']}")
+    return problems
+
+
+def ensure_schema(wait_seconds=300):
+    """
+    创建缺失的索引，等待其上线后校验
+
+    Args:
+        wait_seconds (int): 等待索引填充完成的最长秒数
+
+    Returns:
+        bool: 校验通过返回True
+    """
+    for statement in SCHEMA_STATEMENTS:
+        graph.run(statement)
+    graph.run("CALL db.awaitIndexes($timeout)", timeout=wait_seconds)
+
+    problems = verify_schema()
+    for problem in problems:
+        logger.warning(f"Neo4j索引校验失败: {problem}")
+    if not problems:
+        logger.info(f"Neo4j索引已就绪: {', '.join(EXPECTED_INDEXES)}")
+    return not problems
+
+
+def plan_operators(query, **parameters):
+    """
+    获取查询的执行计划（EXPLAIN，不实际执行）
+
+    Args:
+        query (str): Cypher查询
+        **parameters: 查询参数
+
+    Returns:
+        list: 按深度优先顺序的 (层级, 算子名称)
+    """
+    plan = graph.run(f"EXPLAIN {query}", **parameters).plan()
+    operators, stack = [], [(0, plan)]
+    while stack:
+        depth, node = stack.pop()
+        operators.append((depth, node.operator_type))
+        stack.extend((depth + 1, child) for child in reversed(node.children))
+    return operators
+
+
+def explain_report(queries, **parameters):
+    """
+    输出多条查询的执行计划，便于对比加索引前后的差异
+
+    Args:
+        queries (dict): 名称 -> Cypher查询
+        **parameters: 查询参数
+
+    Returns:
+        str: 报告文本
+    """
+    lines = []
+    for name, query in queries.items():
+        operators = plan_operators(query, **parameters)
+        scans = [operator for _, operator in operators if "LabelScan" in operator or "AllNodesScan" in operator]
+        lines.append(f"== {name}: {'全标签扫描 ' + ', '.join(scans) if scans else '使用索引'}")
+        lines.extend(f"{'  ' * (depth + 1)}{operator}" for depth, operator in operators)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Neo4j索引管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ensure_parser = subparsers.add_parser("ensure", help="创建并校验Words的索引")
+    ensure_parser.add_argument("--wait", type=int, default=300, help="等待索引上线的最长秒数")
+    subparsers.add_parser("show", help="列出Words的索引")
+    explain_parser = subparsers.add_parser("explain", help="对比关键词查询改用索引前后的执行计划")
+    explain_parser.add_argument("entities", nargs="+", help="示例关键词")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "ensure":
+        ok = ensure_schema(args.wait)
+        print("索引校验通过" if ok else "索引校验失败")
+    elif args.command == "show":
+        for index in show_indexes():
+            print(index)
+    elif args.command == "explain":
+        from app.core.graph_backend import KEYWORD_COUNT_QUERY, KEYWORD_COUNT_SCAN_QUERY, keyword_query_rows
+
+        print(explain_report({"改动前（CONTAINS扫描）": KEYWORD_COUNT_SCAN_QUERY,
+                              "改动后（range索引 + 全文索引）": KEYWORD_COUNT_QUERY},
+                             entities=keyword_query_rows(args.entities), index=WORDS_FULLTEXT_INDEX))
+
+
+if __name__ == "__main__":
+    main()
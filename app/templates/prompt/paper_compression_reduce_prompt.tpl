@@ -0,0 +1,18 @@
+# Task Definition
+The academic paper{% if title %} "{{ title }}"{% endif %} was too long to compress in one pass, so it was split into {{ partials | length }} consecutive parts and each part was compressed separately.
+Merge the partial compressions below into a single compressed version of the whole paper:
+1.Keep every technical detail, experimental step, formula, dataset, baseline and number that appears in any part. The Methods and Experiments sections must stay extremely detailed.
+2.Remove repetition between parts and resolve references that span parts, so the result reads as one coherent document.
+3.Do not add information that is not present in the partial compressions.
+4.Ignore the Abstract. Do not include or mention any part of the abstract section of the paper.
+
+# Output Requirements
+Use exactly these sections, in this order: ## Introduction, ## Methods, ## Experiments/Results, ## Conclusions, ## Future Work.
+If no part covers a section, write "Not covered in the paper." under that heading.
+
+# Partial Compressions
+{% for partial in partials %}
+## Part {{ loop.index }}/{{ partials | length }}
+{{ partial }}
+
+{% endfor %}
@@ -6,6 +6,7 @@
 # 注意事项：
 import arxiv
 import json
+import re
 import time
 import logging
 from typing import List, Dict, Any
@@ -13,6 +14,9 @@ from typing import List, Dict, Any
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 匹配新式(2101.00001)与旧式(astro-ph/0601001)arXiv ID，忽略版本号
+_ARXIV_ID_PATTERN = re.compile(r'(\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?', re.IGNORECASE)
+
 def get_authors(authors, first_author=False):
     """
     获取作者信息
@@ -115,18 +119,100 @@ def get_papers(query="astronomy", max_results=2, timeout=30, max_retries=3):
     return paper_list
 
 
+def normalize_arxiv_id(value):
+    """
+    规范化arXiv ID，去掉URL前缀和版本号
+    
+    Args:
+        value: arXiv ID、entry_id URL或PDF链接
+        
+    Returns:
+        str: 规范化后的arXiv ID，无法识别时返回None
+    """
+    if not value:
+        return None
+    match = _ARXIV_ID_PATTERN.search(str(value))
+    if not match:
+        return None
+    return match.group(1)
+
+
+def normalize_doi(doi):
+    """
+    规范化DOI，去掉doi.org前缀并转为小写
+    
+    Args:
+        doi: 原始DOI
+        
+    Returns:
+        str: 规范化后的DOI，为空时返回None
+    """
+    if not doi:
+        return None
+    doi = str(doi).strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "http://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi or None
+
+
+def paper_keys(paper):
+    """
+    获取论文的全部去重键（arXiv ID与DOI）
+    
+    Args:
+        paper: 论文信息字典
+        
+    Returns:
+        List[str]: 去重键列表，形如 "arxiv:2101.00001"、"doi:10.1000/xyz"
+    """
+    keys = []
+    arxiv_id = normalize_arxiv_id(paper.get("id")) or normalize_arxiv_id(paper.get("pdf"))
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    doi = normalize_doi(paper.get("doi"))
+    if doi:
+        # arXiv自动分配的DOI与arXiv ID等价
+        doi_arxiv_id = normalize_arxiv_id(doi) if "arxiv" in doi else None
+        keys.append(f"arxiv:{doi_arxiv_id}" if doi_arxiv_id else f"doi:{doi}")
+    return keys
+
+
+def get_search_backend():
+    """
+    根据配置选择论文检索后端
+    
+    Returns:
+        callable: 与get_papers签名一致的检索函数
+    """
+    from app.core.config import settings
+    
+    if settings.ARXIV_BACKEND == "offline":
+        from app.utils.arxiv_mirror import get_papers_offline
+        return get_papers_offline
+    return get_papers
+
+
 def search_paper(Keywords, Limit=2):
     """
-    搜索多个关键词的论文
+    搜索多个关键词的论文，并按arXiv ID/DOI跨关键词去重
+    
+    同一篇论文被多个关键词检索到时只保留一份，并在
+    matched_keywords 中记录命中的关键词，match_count 为命中次数，
+    供后续排序和下载优先级使用。
     
     Args:
         Keywords: 关键词列表
         Limit: 每个关键词的搜索限制
         
     Returns:
-        List[Dict]: 所有论文信息列表
+        List[Dict]: 去重后的论文信息列表（保持首次出现的顺序）
     """
     data_collector = []
+    search_backend = get_search_backend()
+    # 去重键 -> data_collector中的下标
+    paper_index = {}
+    total_hits = 0
     
     # 限制单次搜索的数量
     if Limit > 50:
@@ -136,8 +222,31 @@ def search_paper(Keywords, Limit=2):
     for keyword in Keywords:
         try:
             logger.info(f"正在检索与技术实体相关的论文: {keyword}")
-            papers = get_papers(query=keyword, max_results=Limit)
-            data_collector += papers
+            papers = search_backend(query=keyword, max_results=Limit)
+            total_hits += len(papers)
+            
+            for paper in papers:
+                keys = paper_keys(paper)
+                position = next((paper_index[key] for key in keys if key in paper_index), None)
+                
+                if position is None:
+                    paper["matched_keywords"] = [keyword]
+                    paper["match_count"] = 1
+                    position = len(data_collector)
+                    data_collector.append(paper)
+                else:
+                    existing = data_collector[position]
+                    if keyword not in existing["matched_keywords"]:
+                        existing["matched_keywords"].append(keyword)
+                        existing["match_count"] = len(existing["matched_keywords"])
+                    # 补全先前记录中缺失的DOI等字段
+                    for field, value in paper.items():
+                        if value and not existing.get(field):
+                            existing[field] = value
+                
+                for key in keys:
+                    paper_index.setdefault(key, position)
+            
             logger.info(f"成功检索到 {len(papers)} 篇与 {keyword} 相关的论文")
             
         except Exception as e:
@@ -145,5 +254,5 @@ def search_paper(Keywords, Limit=2):
             # 继续处理其他关键词，不中断整个流程
             continue
     
-    logger.info(f"总共检索到 {len(data_collector)} 篇论文")
-    return data_collector
\ No newline at end of file
+    logger.info(f"总共检索到 {total_hits} 篇论文，去重后 {len(data_collector)} 篇")
+    return data_collector
@@ -0,0 +1,504 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/2 10:15
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：离线arXiv元数据镜像。
+# 将arXiv公开元数据快照（JSON lines）导入为磁盘上的列式存储与标题/摘要倒排索引，
+# 查询时通过numpy内存映射读取，返回与get_papers相同结构的论文字典。
+# 导入时列数据直接写盘，倒排表按分块落盘后多路归并，完整快照也只占用一个分块的内存。
+#
+# 导入: python -m app.utils.arxiv_mirror ingest arxiv-metadata-oai-snapshot.json data/arxiv_mirror
+# 查询: python -m app.utils.arxiv_mirror search data/arxiv_mirror "pulsar candidate classification"
+# 离线样例: python -m app.utils.arxiv_mirror ingest scripts/fixtures/arxiv_snapshot_sample.jsonl /tmp/arxiv_mirror
+
+import argparse
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from email.utils import parsedate_to_datetime
+
+import numpy as np
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+MIRROR_VERSION = 1
+
+# 列式存储中的字段，与get_papers返回的字典字段一致
+COLUMNS = ("title", "id", "doi", "pdf", "abstract", "authors", "category", "time")
+
+# BM25参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were which with we our
+these those their there than then thus into can also using use used based via between such not but both
+""".split())
+
+
+def tokenize(text):
+    """
+    将标题/摘要切分为小写词项，去除停用词和单字符词
+
+    Args:
+        text (str): 原始文本
+
+    Returns:
+        list: 词项列表
+    """
+    if not text:
+        return []
+    return [token for token in _TOKEN_PATTERN.findall(text.lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class StringColumn:
+    """内存映射的字符串列：一个UTF-8数据文件加一个int64偏移数组"""
+
+    def __init__(self, data_path, offsets_path):
+        self.offsets = np.load(offsets_path, mmap_mode='r')
+        # 空文件无法mmap
+        if os.path.getsize(data_path) > 0:
+            self.data = np.memmap(data_path, dtype=np.uint8, mode='r')
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.data[start:end].tobytes().decode('utf-8')
+
+
+def _write_string_column(values, data_path, offsets_path):
+    """
+    将字符串列表写成数据文件和偏移数组
+
+    Args:
+        values (iterable): 字符串序列
+        data_path (str): 数据文件路径
+        offsets_path (str): 偏移数组(.npy)路径
+    """
+    offsets = array('q', [0])
+    with open(data_path, 'wb') as f:
+        position = 0
+        for value in values:
+            encoded = (value or "").encode('utf-8')
+            f.write(encoded)
+            position += len(encoded)
+            offsets.append(position)
+    np.save(offsets_path, np.frombuffer(offsets, dtype=np.int64))
+
+
+def _parse_record(record):
+    """
+    将快照中的一条记录转换为get_papers的字典结构
+
+    Args:
+        record (dict): 快照中的一行JSON
+
+    Returns:
+        dict: 论文信息字典
+    """
+    arxiv_id = record["id"]
+    versions = record.get("versions") or []
+    latest = versions[-1]["version"] if versions else "v1"
+
+    publish_time = record.get("update_date") or ""
+    if versions and versions[0].get("created"):
+        try:
+            publish_time = parsedate_to_datetime(versions[0]["created"]).date().isoformat()
+        except (TypeError, ValueError):
+            pass
+
+    categories = (record.get("categories") or "").split()
+
+    return {
+        "title": " ".join((record.get("title") or "").split()),
+        "id": f"http://arxiv.org/abs/{arxiv_id}{latest}",
+        "doi": record.get("doi") or "",
+        "pdf": f"http://arxiv.org/pdf/{arxiv_id}{latest}",
+        "abstract": " ".join((record.get("abstract") or "").split()),
+        "authors": " ".join((record.get("authors") or "").split()),
+        "category": categories[0] if categories else "",
+        "time": publish_time,
+    }
+
+
+def _spill_postings(postings, run_path):
+    """
+    把一个分块的倒排表按词项排序写入磁盘（格式与最终倒排索引相同）
+
+    Args:
+        postings (dict): 词项 -> (文档号数组, 词频数组)
+        run_path (str): 分块目录
+    """
+    os.makedirs(run_path, exist_ok=True)
+    terms = sorted(postings)
+    _write_string_column(terms, os.path.join(run_path, "terms.bin"), os.path.join(run_path, "terms.off.npy"))
+    posting_offsets = array('q', [0])
+    with open(os.path.join(run_path, "postings_doc.bin"), 'wb') as doc_file, \
+            open(os.path.join(run_path, "postings_tf.bin"), 'wb') as tf_file:
+        for term in terms:
+            doc_ids, freqs = postings[term]
+            doc_ids.tofile(doc_file)
+            freqs.tofile(tf_file)
+            posting_offsets.append(posting_offsets[-1] + len(doc_ids))
+    np.save(os.path.join(run_path, "postings.off.npy"), np.frombuffer(posting_offsets, dtype=np.int64))
+
+
+def _merge_postings(run_paths, mirror_path):
+    """
+    多路归并各分块的倒排表；分块按文档号先后生成，同一词项按分块顺序拼接后文档号仍有序
+
+    Args:
+        run_paths (list): 分块目录，按生成顺序排列
+        mirror_path (str): 镜像目录
+
+    Returns:
+        tuple: (词项数, 倒排记录总数)
+    """
+    runs = []
+    for run_path in run_paths:
+        terms = StringColumn(os.path.join(run_path, "terms.bin"), os.path.join(run_path, "terms.off.npy"))
+        offsets = np.load(os.path.join(run_path, "postings.off.npy"), mmap_mode='r')
+        # 空文件无法mmap
+        docs = np.memmap(os.path.join(run_path, "postings_doc.bin"), dtype=np.uint32, mode='r') if offsets[-1] else None
+        tfs = np.memmap(os.path.join(run_path, "postings_tf.bin"), dtype=np.uint16, mode='r') if offsets[-1] else None
+        runs.append((terms, offsets, docs, tfs))
+
+    def run_terms(run_index):
+        terms = runs[run_index][0]
+        for term_index in range(len(terms)):
+            yield terms[term_index], run_index, term_index
+
+    term_offsets = array('q', [0])
+    posting_offsets = array('q', [0])
+    with open(os.path.join(mirror_path, "terms.bin"), 'wb') as term_file, \
+            open(os.path.join(mirror_path, "postings_doc.bin"), 'wb') as doc_file, \
+            open(os.path.join(mirror_path, "postings_tf.bin"), 'wb') as tf_file:
+        current, length = None, 0
+        for term, run_index, term_index in heapq.merge(*(run_terms(i) for i in range(len(runs)))):
+            if term != current:
+                if current is not None:
+                    posting_offsets.append(posting_offsets[-1] + length)
+                encoded = term.encode('utf-8')
+                term_file.write(encoded)
+                term_offsets.append(term_offsets[-1] + len(encoded))
+                current, length = term, 0
+            _, offsets, docs, tfs = runs[run_index]
+            start, end = int(offsets[term_index]), int(offsets[term_index + 1])
+            docs[start:end].tofile(doc_file)
+            tfs[start:end].tofile(tf_file)
+            length += end - start
+        if current is not None:
+            posting_offsets.append(posting_offsets[-1] + length)
+
+    np.save(os.path.join(mirror_path, "terms.off.npy"), np.frombuffer(term_offsets, dtype=np.int64))
+    np.save(os.path.join(mirror_path, "postings.off.npy"), np.frombuffer(posting_offsets, dtype=np.int64))
+    return len(term_offsets) - 1, posting_offsets[-1]
+
+
+def ingest_snapshot(snapshot_path, mirror_path, categories=None, limit=None, chunk_size=200000):
+    """
+    导入arXiv元数据快照，生成列式存储和倒排索引
+
+    列数据边读边写入磁盘；倒排表每chunk_size篇论文落盘为一个有序分块，最后多路归并，
+    内存占用只与分块大小有关，与快照大小无关。
+
+    Args:
+        snapshot_path (str): 快照文件路径（JSON lines）
+        mirror_path (str): 镜像输出目录
+        categories (list): 只保留这些分类前缀的论文（如["astro-ph"]），None表示全部
+        limit (int): 最多导入的论文数，None表示不限制
+        chunk_size (int): 每个倒排分块包含的论文数
+
+    Returns:
+        int: 导入的论文数量
+    """
+    start_time = time.time()
+    os.makedirs(mirror_path, exist_ok=True)
+    runs_dir = os.path.join(mirror_path, "ingest_runs")
+    shutil.rmtree(runs_dir, ignore_errors=True)
+
+    column_files = {name: open(os.path.join(mirror_path, f"col_{name}.bin"), 'wb') for name in COLUMNS}
+    offset_files = {name: open(os.path.join(mirror_path, f"col_{name}.off.tmp"), 'wb') for name in COLUMNS}
+    positions = dict.fromkeys(COLUMNS, 0)
+    # 偏移量攒够一批再写入，避免每篇论文一次系统调用
+    offset_buffers = {name: array('q', [0]) for name in COLUMNS}
+    doc_lengths = array('I')
+    run_paths = []
+    # 当前分块：词项 -> (文档号数组, 词频数组)
+    postings = {}
+
+    try:
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if limit is not None and len(doc_lengths) >= limit:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    paper = _parse_record(record)
+                except (ValueError, KeyError) as e:
+                    logger.warning(f"跳过无法解析的快照记录: {e}")
+                    continue
+
+                if categories:
+                    paper_categories = (record.get("categories") or "").split()
+                    if not any(c.startswith(prefix) for c in paper_categories for prefix in categories):
+                        continue
+
+                doc_id = len(doc_lengths)
+                for name in COLUMNS:
+                    encoded = (paper[name] or "").encode('utf-8')
+                    column_files[name].write(encoded)
+                    positions[name] += len(encoded)
+                    offset_buffers[name].append(positions[name])
+                    if len(offset_buffers[name]) >= 65536:
+                        offset_buffers[name].tofile(offset_files[name])
+                        offset_buffers[name] = array('q')
+
+                term_freqs = {}
+                tokens = tokenize(paper["title"]) + tokenize(paper["abstract"])
+                for token in tokens:
+                    term_freqs[token] = term_freqs.get(token, 0) + 1
+                doc_lengths.append(len(tokens))
+
+                for token, freq in term_freqs.items():
+                    entry = postings.get(token)
+                    if entry is None:
+                        entry = postings[token] = (array('I'), array('H'))
+                    entry[0].append(doc_id)
+                    entry[1].append(min(freq, 0xFFFF))
+
+                if len(doc_lengths) % chunk_size == 0:
+                    run_paths.append(os.path.join(runs_dir, f"run_{len(run_paths):05d}"))
+                    _spill_postings(postings, run_paths[-1])
+                    postings = {}
+        for name in COLUMNS:
+            offset_buffers[name].tofile(offset_files[name])
+    finally:
+        for file in (*column_files.values(), *offset_files.values()):
+            file.close()
+
+    if postings or not run_paths:
+        run_paths.append(os.path.join(runs_dir, f"run_{len(run_paths):05d}"))
+        _spill_postings(postings, run_paths[-1])
+    del postings
+
+    for name in COLUMNS:
+        tmp_path = os.path.join(mirror_path, f"col_{name}.off.tmp")
+        np.save(os.path.join(mirror_path, f"col_{name}.off.npy"), np.fromfile(tmp_path, dtype=np.int64))
+        os.remove(tmp_path)
+
+    term_count, posting_count = _merge_postings(run_paths, mirror_path)
+    shutil.rmtree(runs_dir, ignore_errors=True)
+    np.save(os.path.join(mirror_path, "doc_len.npy"), np.frombuffer(doc_lengths, dtype=np.uint32))
+
+    meta = {
+        "version": MIRROR_VERSION,
+        "count": len(doc_lengths),
+        "terms": term_count,
+        "postings": posting_count,
+        "source": os.path.abspath(snapshot_path),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(os.path.join(mirror_path, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"arXiv镜像导入完成: {meta['count']} 篇论文, {meta['terms']} 个词项, "
+                f"{len(run_paths)} 个倒排分块, 耗时 {time.time() - start_time:.1f} 秒")
+    return meta["count"]
+
+
+class ArxivMirror:
+    """离线arXiv镜像的只读查询接口，所有数组均以内存映射方式打开"""
+
+    def __init__(self, mirror_path):
+        meta_path = os.path.join(mirror_path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"arXiv镜像不存在，请先执行ingest: {mirror_path}")
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != MIRROR_VERSION:
+            raise ValueError(f"arXiv镜像版本不匹配: {self.meta.get('version')} != {MIRROR_VERSION}")
+
+        self.path = mirror_path
+        self.columns = {name: StringColumn(os.path.join(mirror_path, f"col_{name}.bin"),
+                                           os.path.join(mirror_path, f"col_{name}.off.npy"))
+                        for name in COLUMNS}
+        self.terms = StringColumn(os.path.join(mirror_path, "terms.bin"),
+                                  os.path.join(mirror_path, "terms.off.npy"))
+        self.posting_offsets = np.load(os.path.join(mirror_path, "postings.off.npy"), mmap_mode='r')
+        self.doc_lengths = np.load(os.path.join(mirror_path, "doc_len.npy"), mmap_mode='r')
+        self.count = int(self.meta["count"])
+
+        if self.meta["postings"] > 0:
+            self.posting_docs = np.memmap(os.path.join(mirror_path, "postings_doc.bin"), dtype=np.uint32, mode='r')
+            self.posting_tfs = np.memmap(os.path.join(mirror_path, "postings_tf.bin"), dtype=np.uint16, mode='r')
+        else:
+            self.posting_docs = np.zeros(0, dtype=np.uint32)
+            self.posting_tfs = np.zeros(0, dtype=np.uint16)
+        self.avg_doc_length = float(self.doc_lengths.mean()) if self.count else 0.0
+
+    def __len__(self):
+        return self.count
+
+    def _postings(self, term):
+        """返回词项的(文档号, 词频)数组，未收录时返回None"""
+        index = bisect.bisect_left(self.terms, term)
+        if index >= len(self.terms) or self.terms[index] != term:
+            return None
+        start, end = int(self.posting_offsets[index]), int(self.posting_offsets[index + 1])
+        return self.posting_docs[start:end], self.posting_tfs[start:end]
+
+    def paper(self, doc_id):
+        """
+        读取单篇论文
+
+        Args:
+            doc_id (int): 文档号
+
+        Returns:
+            dict: 论文信息字典
+        """
+        return {name: self.columns[name][doc_id] for name in COLUMNS}
+
+    def search(self, query, max_results=10):
+        """
+        基于BM25检索标题和摘要
+
+        Args:
+            query (str): 查询字符串
+            max_results (int): 最大结果数量
+
+        Returns:
+            list: [(文档号, 得分)]，按得分降序
+        """
+        if not self.count or max_results <= 0:
+            return []
+
+        scores = None
+        for term in set(tokenize(query)):
+            entry = self._postings(term)
+            if entry is None:
+                continue
+            doc_ids, tfs = entry
+            idf = math.log(1 + (self.count - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+            tfs = tfs.astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_ids] / self.avg_doc_length)
+            if scores is None:
+                scores = np.zeros(self.count, dtype=np.float32)
+            scores[doc_ids] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        if scores is None:
+            return []
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > max_results:
+            top = np.argpartition(-scores[candidates], max_results - 1)[:max_results]
+            candidates = candidates[top]
+        # 得分降序，得分相同按文档号升序
+        order = np.lexsort((candidates, -scores[candidates]))
+        return [(int(candidates[i]), float(scores[candidates[i]])) for i in order]
+
+
+_mirrors = {}
+_mirrors_lock = threading.Lock()
+
+
+def open_mirror(mirror_path):
+    """
+    打开（并缓存）离线arXiv镜像
+
+    Args:
+        mirror_path (str): 镜像目录
+
+    Returns:
+        ArxivMirror: 镜像实例
+    """
+    mirror_path = os.path.abspath(mirror_path)
+    with _mirrors_lock:
+        mirror = _mirrors.get(mirror_path)
+        if mirror is None:
+            mirror = _mirrors[mirror_path] = ArxivMirror(mirror_path)
+        return mirror
+
+
+def get_papers_offline(query="astronomy", max_results=2, timeout=30, max_retries=3, mirror_path=None):
+    """
+    从离线镜像获取论文信息，参数与返回结构与get_papers一致
+
+    Args:
+        query: 搜索查询字符串
+        max_results: 最大结果数量
+        timeout: 兼容get_papers的参数，离线检索不使用
+        max_retries: 兼容get_papers的参数，离线检索不使用
+        mirror_path: 镜像目录，默认使用配置中的ARXIV_MIRROR_PATH
+
+    Returns:
+        List[Dict]: 论文信息列表
+    """
+    if mirror_path is None:
+        from app.core.config import settings
+        mirror_path = settings.ARXIV_MIRROR_PATH
+
+    mirror = open_mirror(mirror_path)
+    start_time = time.time()
+
+    paper_list = []
+    for doc_id, _ in mirror.search(query, max_results=max_results):
+        data = {"topic": query}
+        data.update(mirror.paper(doc_id))
+        paper_list.append(data)
+
+    logger.info(f"离线镜像检索 '{query}' 得到 {len(paper_list)} 篇论文，"
+                f"耗时 {(time.time() - start_time) * 1000:.1f} 毫秒")
+    return paper_list
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线arXiv元数据镜像")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="导入arXiv元数据快照")
+    ingest_parser.add_argument("snapshot", help="快照文件路径（JSON lines）")
+    ingest_parser.add_argument("mirror", help="镜像输出目录")
+    ingest_parser.add_argument("--categories", nargs="*", help="只导入这些分类前缀，如 astro-ph")
+    ingest_parser.add_argument("--limit", type=int, help="最多导入的论文数")
+    ingest_parser.add_argument("--chunk-size", type=int, default=200000, help="每个倒排分块包含的论文数")
+
+    search_parser = subparsers.add_parser("search", help="在镜像中检索")
+    search_parser.add_argument("mirror", help="镜像目录")
+    search_parser.add_argument("query", help="查询字符串")
+    search_parser.add_argument("-n", "--max-results", type=int, default=5)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "ingest":
+        ingest_snapshot(args.snapshot, args.mirror, categories=args.categories, limit=args.limit,
+                        chunk_size=args.chunk_size)
+    else:
+        papers = get_papers_offline(args.query, max_results=args.max_results, mirror_path=args.mirror)
+        print(json.dumps(papers, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/16 10:15
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：长论文分块压缩（map-reduce）。
+# Markdown按章节标题切分并打包成不超过token上限的块，各块并发调用paper_compression_prompt压缩（map），
+# 再用paper_compression_reduce_prompt模板把各块结果合并为最终压缩稿（reduce）；合并输入仍超限时分组逐层合并。
+# token数用tiktoken计算；编码表无法加载（如离线）时按字符估算（CJK字符计1个token，其余约4个字符计1个token）。
+
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import tiktoken
+
+from app.core.config import settings
+from app.core.prompt import paper_compression_prompt
+from app.core.tpl import templates_dir, tpl_env
+from app.utils.llm_api import call_with_deepseek
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+COMPRESSION_SYSTEM_PROMPT = "You are a helpful assistant for academic paper compression."
+
+# 压缩所用的模型（与call_with_deepseek一致），作为压缩结果缓存键的一部分
+COMPRESSION_MODEL = "deepseek-chat"
+
+# 决定压缩结果的提示模板，内容变化即视为新的提示版本
+COMPRESSION_TEMPLATES = ("prompt/paper_compression_prompt.tpl", "prompt/paper_compression_reduce_prompt.tpl")
+
+_HEADING_PATTERN = re.compile(r'^#{1,6}\s', re.MULTILINE)
+_CJK_PATTERN = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+
+@lru_cache(maxsize=1)
+def compression_prompt_version():
+    """
+    压缩提示的版本：系统提示、压缩/合并模板内容与分块大小的哈希
+
+    Returns:
+        str: 12位十六进制版本号
+    """
+    digest = hashlib.sha256(COMPRESSION_SYSTEM_PROMPT.encode('utf-8'))
+    digest.update(str(settings.COMPRESSION_CHUNK_TOKENS).encode('utf-8'))
+    for name in COMPRESSION_TEMPLATES:
+        with open(os.path.join(templates_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"无法加载tiktoken编码表，改为按字符估算token数: {e}")
+        return None
+
+
+def estimate_tokens(text):
+    """
+    计算文本的token数
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        int: token数（编码表不可用时为估算值）
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_sections(markdown):
+    """
+    按章节标题切分Markdown，标题与其正文在同一段
+
+    Args:
+        markdown (str): Markdown文本
+
+    Returns:
+        list: 章节文本列表（第一个标题之前的内容单独成段）
+    """
+    starts = [match.start() for match in _HEADING_PATTERN.finditer(markdown)]
+    bounds = [0] + [start for start in starts if start > 0] + [len(markdown)]
+    sections = [markdown[begin:end].strip() for begin, end in zip(bounds, bounds[1:])]
+    return [section for section in sections if section]
+
+
+def _split_oversized(text, max_tokens):
+    """把超过上限的章节按段落、再按字符切开"""
+    pieces = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        # 单个段落仍超限（如超长表格）：按每token平均字符数折算后硬切
+        step = max(int(max_tokens * len(paragraph) / estimate_tokens(paragraph)), 1)
+        pieces.extend(paragraph[i:i + step] for i in range(0, len(paragraph), step))
+    return pieces
+
+
+def chunk_markdown(markdown, max_tokens):
+    """
+    把Markdown切成不超过max_tokens的块，尽量在章节边界处切分
+
+    Args:
+        markdown (str): Markdown文本
+        max_tokens (int): 每块的token上限
+
+    Returns:
+        list: 块文本列表
+    """
+    pieces = []
+    for section in split_sections(markdown):
+        if estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+        else:
+            pieces.extend(_split_oversized(section, max_tokens))
+
+    chunks, current, current_tokens = [], [], 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _render_reduce_prompt(partials, title):
+    template = tpl_env.get_template("prompt/paper_compression_reduce_prompt.tpl")
+    return template.render(partials=partials, title=title)
+
+
+def compress_markdown(content, title="", max_chunk_tokens=None, max_workers=None, llm=call_with_deepseek):
+    """
+    压缩论文Markdown，长论文分块并发压缩后合并
+
+    Args:
+        content (str): 论文Markdown
+        title (str): 论文标题，用于合并提示
+        max_chunk_tokens (int): 每块的token上限，默认读取配置COMPRESSION_CHUNK_TOKENS
+        max_workers (int): 并发调用数，默认读取配置COMPRESSION_WORKERS
+        llm (callable): llm(system_prompt, question) -> str
+
+    Returns:
+        str: 压缩后的内容
+    """
+    max_chunk_tokens = max_chunk_tokens or settings.COMPRESSION_CHUNK_TOKENS
+    max_workers = max_workers or settings.COMPRESSION_WORKERS
+
+    chunks = chunk_markdown(content, max_chunk_tokens)
+    if len(chunks) <= 1:
+        # 短论文与原来一样一次压缩
+        return llm(system_prompt=COMPRESSION_SYSTEM_PROMPT, question=paper_compression_prompt(content=content))
+
+    logger.info(f"论文分为 {len(chunks)} 块并发压缩: {title}")
+    questions = [paper_compression_prompt(content=f"(Part {i + 1}/{len(chunks)} of the paper)\n\n{chunk}")
+                 for i, chunk in enumerate(chunks)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        partials = list(executor.map(lambda question: llm(system_prompt=COMPRESSION_SYSTEM_PROMPT,
+                                                          question=question), questions))
+
+        # 合并输入超限时分组合并（每组至少两份，保证每层数量减半），每一层的组之间并发
+        while estimate_tokens("\n\n".join(partials)) > max_chunk_tokens and len(partials) > 2:
+            groups, group, group_tokens = [], [], 0
+            for partial in partials:
+                tokens = estimate_tokens(partial)
+                if len(group) >= 2 and group_tokens + tokens > max_chunk_tokens:
+                    groups.append(group)
+                    group, group_tokens = [], 0
+                group.append(partial)
+                group_tokens += tokens
+            groups.append(group)
+            partials = list(executor.map(
+                lambda g: g[0] if len(g) == 1 else llm(system_prompt=COMPRESSION_SYSTEM_PROMPT,
+                                                       question=_render_reduce_prompt(g, title)), groups))
+
+    return llm(system_prompt=COMPRESSION_SYSTEM_PROMPT, question=_render_reduce_prompt(partials, title))
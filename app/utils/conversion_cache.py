@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/14 11:40
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：PDF转Markdown结果缓存。
+# 键为 PDF内容的SHA-256 + 转换器版本，同一PDF无论来自哪个主题/用户都只上传转换一次；
+# 转换器升级时修改其版本号即可让旧结果自然失效（随LRU淘汰）。
+#
+# 统计: python -m app.utils.conversion_cache stats
+# 淘汰: python -m app.utils.conversion_cache evict --max-bytes 1000000000
+
+import logging
+import os
+import threading
+
+from app.core.config import OUTPUT_PATH, settings
+from app.utils.disk_cache import DiskCache
+from app.utils.object_store import build_cli, run_cli
+from app.utils.pdf_store import file_sha256
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_conversion_cache():
+    """
+    获取全局转换缓存，未启用时返回None
+
+    Returns:
+        DiskCache: 缓存实例
+    """
+    global _cache
+    if not settings.CONVERSION_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            root = settings.CONVERSION_CACHE_PATH or os.path.join(OUTPUT_PATH, "conversion_cache")
+            _cache = DiskCache(root, max_bytes=settings.CONVERSION_CACHE_MAX_BYTES)
+        return _cache
+
+
+def cached_convert(pdf_path, output_path, converter, convert_func):
+    """
+    先查缓存，未命中时调用转换函数并缓存结果
+
+    Args:
+        pdf_path (str): PDF文件路径
+        output_path (str): 输出路径
+        converter (str): 转换器版本标识，如 "mineru-api/1"
+        convert_func (callable): convert_func(pdf_path, output_path) -> Markdown文件路径或None
+
+    Returns:
+        str: Markdown文件路径（<output_path>/<PDF文件名>.md），失败返回None
+    """
+    cache = get_conversion_cache()
+    if cache is None:
+        return convert_func(pdf_path, output_path)
+
+    try:
+        key = f"{file_sha256(pdf_path)}:{converter}"
+        markdown = cache.get(key)
+    except Exception as e:
+        logger.warning(f"读取转换缓存失败: {e}")
+        return convert_func(pdf_path, output_path)
+
+    if markdown is not None:
+        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        md_file_path = os.path.join(output_path, f"{pdf_name}.md")
+        os.makedirs(output_path, exist_ok=True)
+        with open(md_file_path, 'wb') as f:
+            f.write(markdown)
+        logger.info(f"转换缓存命中: {pdf_path} ({converter})")
+        return md_file_path
+
+    md_file_path = convert_func(pdf_path, output_path)
+    if md_file_path:
+        try:
+            with open(md_file_path, 'rb') as f:
+                cache.put(key, f.read())
+        except Exception as e:
+            logger.warning(f"写入转换缓存失败: {e}")
+    return md_file_path
+
+
+def main():
+    parser, _ = build_cli("PDF转Markdown结果缓存")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    cache = get_conversion_cache()
+    if cache is None:
+        print("转换缓存未启用（CONVERSION_CACHE_ENABLED=False）")
+        return
+    run_cli(cache, args)
+
+
+if __name__ == "__main__":
+    main()
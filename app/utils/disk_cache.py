@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/14 10:30
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：通用磁盘缓存。
+# 值以gzip压缩后存放在 objects/<前两位>/<键的sha256>.gz，sqlite索引（ObjectStore）记录大小和最近访问时间；
+# 总大小超过上限时按最近访问时间淘汰，可选按写入时间过期（TTL），命中/未命中次数持久化在索引中。
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from app.utils.object_store import ObjectStore
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class DiskCache(ObjectStore):
+    """gzip压缩、按大小做LRU淘汰、可选TTL过期的磁盘缓存"""
+
+    table = "entries"
+    key_column = "key"
+    label = "缓存"
+
+    def __init__(self, root, max_bytes=0, ttl=0):
+        """
+        Args:
+            root (str): 缓存目录
+            max_bytes (int): 压缩后的总大小上限，0表示不限
+            ttl (float): 条目自写入起的有效秒数，0表示不过期
+        """
+        self.ttl = ttl
+        super().__init__(root, max_bytes)
+
+    def _object_path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def get(self, key):
+        """
+        读取缓存
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            bytes: 解压后的值，未命中返回None
+        """
+        object_path = self._object_path(key)
+        with self._connect() as conn:
+            row = conn.execute("SELECT created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            data = None
+            if row is not None and self.ttl and row[0] + self.ttl < time.time():
+                self._remove(conn, key)
+                self._incr(conn, "expired")
+            elif row is not None:
+                try:
+                    with gzip.open(object_path, 'rb') as f:
+                        data = f.read()
+                except (OSError, EOFError) as e:
+                    # 对象文件丢失或损坏
+                    logger.warning(f"缓存对象不可用，已移除: {key} ({e})")
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+            if data is None:
+                self._incr(conn, "misses")
+                return None
+            self._touch(conn, key)
+            self._incr(conn, "hits")
+            return data
+
+    def put(self, key, data):
+        """
+        写入缓存
+
+        Args:
+            key (str): 缓存键
+            data (bytes): 值
+        """
+        object_path = self._object_path(key)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, object_path)
+
+        size = os.path.getsize(object_path)
+        with self._connect() as conn:
+            total = self._record(conn, key, size)
+            self._incr(conn, "raw_bytes", len(data))
+            self._incr(conn, "stored_bytes", size)
+
+        if self.max_bytes and total > self.max_bytes:
+            # 先删除已过期的条目，仍超限时再按最近访问时间淘汰
+            self.expire()
+            self.evict(self.max_bytes)
+
+    def contains(self, key):
+        """
+        判断缓存中是否有未过期的条目（不计入命中统计）
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            bool: 存在返回True
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        return row is not None and not (self.ttl and row[0] + self.ttl < time.time())
+
+    def expire(self, ttl=None):
+        """
+        删除写入时间超过ttl的条目
+
+        Args:
+            ttl (float): 有效秒数，默认使用构造时的ttl
+
+        Returns:
+            int: 删除的条目数
+        """
+        ttl = self.ttl if ttl is None else ttl
+        if not ttl:
+            return 0
+        with self._connect() as conn:
+            keys = [row[0] for row in conn.execute("SELECT key FROM entries WHERE created_at < ?",
+                                                   (time.time() - ttl,)).fetchall()]
+            for key in keys:
+                self._remove(conn, key)
+            if keys:
+                self._incr(conn, "expired", len(keys))
+        if keys:
+            logger.info(f"缓存 {self.root} 过期删除 {len(keys)} 条")
+        return len(keys)
+
+    def stats(self):
+        """
+        获取缓存统计信息
+
+        Returns:
+            dict: 条目数、总大小、命中/未命中次数、命中率、压缩率、淘汰的字节数和过期条目数
+        """
+        stats = super().stats()
+        raw_bytes = stats.pop("raw_bytes", 0)
+        stored_bytes = stats.pop("stored_bytes", 0)
+        stats["compression_ratio"] = stored_bytes / raw_bytes if raw_bytes else 0.0
+        stats.setdefault("expired", 0)
+        return stats
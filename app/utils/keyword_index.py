@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/18 16:30
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：进程内关键词出现次数索引。
+# 启动时按节点ID分页把全部Words节点（从GRAPH_BACKEND）批量读入内存，名称和别名（other中以单引号包围的词）映射到出现次数，
+# 同一个词出现在多个节点时取最大值，与 SearchKeyWordScore 原查询的 ORDER BY n.count DESC LIMIT 1 一致。
+# 后台线程按KEYWORD_INDEX_REFRESH_INTERVAL增量读取ID大于水位线的新节点，
+# 按KEYWORD_INDEX_FULL_RELOAD_INTERVAL整体重建（已有节点的count变化只在重建时生效）。
+# 索引未命中的词由调用方回退到图谱后端查询（可能是上次刷新后新增的节点）。
+#
+# 统计: python -m app.utils.keyword_index stats
+# 查询: python -m app.utils.keyword_index lookup transformer "dark matter"
+
+import argparse
+import logging
+import sys
+import threading
+import time
+
+from app.core.config import settings
+from app.core.graph_backend import get_graph_backend, parse_aliases
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class KeywordIndex:
+    """关键词（名称和别名）到出现次数的内存索引"""
+
+    def __init__(self, batch_size=50000):
+        """
+        Args:
+            batch_size (int): 分页读取Words节点时每页的节点数
+        """
+        self.batch_size = batch_size
+        self._counts = {}
+        self._watermark = -1
+        self._nodes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.loaded_at = 0.0
+        self.refreshed_at = 0.0
+        self.load_seconds = 0.0
+        self.refresh_seconds = 0.0
+
+    def _scan(self, counts, after):
+        """读取ID大于after的节点并写入counts，返回(新水位线, 节点数)"""
+        nodes, backend = 0, get_graph_backend()
+        while True:
+            records = backend.words_page(after, self.batch_size)
+            for record in records:
+                count = record['count'] or 0
+                for term in [record['name'], *parse_aliases(record['other'])]:
+                    if term and count >= counts.get(term, -1):
+                        counts[sys.intern(term)] = count
+            nodes += len(records)
+            if len(records) < self.batch_size:
+                return after if not records else records[-1]['id'], nodes
+            after = records[-1]['id']
+
+    def load(self):
+        """全量重建索引，完成后整体替换旧索引"""
+        start = time.time()
+        counts = {}
+        watermark, nodes = self._scan(counts, -1)
+        with self._lock:
+            self._counts, self._watermark, self._nodes = counts, watermark, nodes
+        self.loaded_at = self.refreshed_at = time.time()
+        self.load_seconds = self.loaded_at - start
+        logger.info(f"关键词索引已加载: {nodes} 个节点、{len(counts)} 个词，"
+                    f"耗时 {self.load_seconds:.2f}s，约 {self.memory_bytes() / 1024 / 1024:.1f} MB")
+
+    def refresh(self):
+        """
+        增量读取上次水位线之后新增的节点
+
+        Returns:
+            int: 新增的节点数
+        """
+        start = time.time()
+        with self._lock:
+            after = self._watermark
+        additions = {}
+        watermark, nodes = self._scan(additions, after)
+        with self._lock:
+            for term, count in additions.items():
+                if count >= self._counts.get(term, -1):
+                    self._counts[term] = count
+            self._watermark = max(self._watermark, watermark)
+            self._nodes += nodes
+        self.refreshed_at = time.time()
+        self.refresh_seconds = self.refreshed_at - start
+        if nodes:
+            logger.info(f"关键词索引增量刷新: 新增 {nodes} 个节点，耗时 {self.refresh_seconds:.2f}s")
+        return nodes
+
+    def lookup(self, entities):
+        """
+        查询关键词的出现次数
+
+        Args:
+            entities (list): 关键词列表
+
+        Returns:
+            tuple: (命中的 关键词 -> 出现次数, 未命中的关键词列表)
+        """
+        found, missing = {}, []
+        with self._lock:
+            for entity in dict.fromkeys(entities):
+                count = self._counts.get(entity)
+                if count is None:
+                    missing.append(entity)
+                else:
+                    found[entity] = count
+        return found, missing
+
+    def memory_bytes(self):
+        """估算索引占用的内存（字典本身、键字符串和计数对象）"""
+        with self._lock:
+            items = list(self._counts.items())
+            size = sys.getsizeof(self._counts)
+        return size + sum(sys.getsizeof(term) + sys.getsizeof(count) for term, count in items)
+
+    def report(self):
+        """
+        获取索引统计信息
+
+        Returns:
+            dict: 节点数、词数、内存占用、最近一次全量加载和增量刷新的耗时等
+        """
+        with self._lock:
+            nodes, terms, watermark = self._nodes, len(self._counts), self._watermark
+        return {
+            "nodes": nodes,
+            "terms": terms,
+            "memory_mb": round(self.memory_bytes() / 1024 / 1024, 2),
+            "watermark": watermark,
+            "load_seconds": round(self.load_seconds, 3),
+            "refresh_seconds": round(self.refresh_seconds, 3),
+            "loaded_at": self.loaded_at,
+            "refreshed_at": self.refreshed_at,
+        }
+
+    def _refresh_loop(self, refresh_interval, full_reload_interval):
+        while not self._stop.wait(refresh_interval):
+            try:
+                if full_reload_interval and time.time() - self.loaded_at >= full_reload_interval:
+                    self.load()
+                else:
+                    self.refresh()
+            except Exception as e:
+                logger.warning(f"关键词索引刷新失败: {e}")
+
+    def start(self, refresh_interval, full_reload_interval=0):
+        """
+        启动后台刷新线程
+
+        Args:
+            refresh_interval (float): 增量刷新间隔（秒）
+            full_reload_interval (float): 全量重建间隔（秒），0表示只做增量刷新
+        """
+        if self._thread is not None or not refresh_interval:
+            return
+        self._thread = threading.Thread(target=self._refresh_loop, args=(refresh_interval, full_reload_interval),
+                                        name="keyword-index-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop.set()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_keyword_index():
+    """
+    获取全局关键词索引，首次调用时全量加载并启动后台刷新；未启用或加载失败时返回None
+
+    Returns:
+        KeywordIndex: 索引实例
+    """
+    global _index
+    if not settings.KEYWORD_INDEX_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            index = KeywordIndex(batch_size=settings.KEYWORD_INDEX_BATCH_SIZE)
+            try:
+                index.load()
+            except Exception as e:
+                logger.warning(f"关键词索引加载失败，改为直接查询图谱后端: {e}")
+                return None
+            index.start(settings.KEYWORD_INDEX_REFRESH_INTERVAL, settings.KEYWORD_INDEX_FULL_RELOAD_INTERVAL)
+            _index = index
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词出现次数索引")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="加载索引并输出内存占用和加载耗时")
+    lookup_parser = subparsers.add_parser("lookup", help="查询关键词的出现次数")
+    lookup_parser.add_argument("entities", nargs="+", help="关键词")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    index = KeywordIndex(batch_size=settings.KEYWORD_INDEX_BATCH_SIZE)
+    index.load()
+    if args.command == "lookup":
+        found, missing = index.lookup(args.entities)
+        for entity in args.entities:
+            print(f"{entity}\t{found.get(entity, '未命中')}")
+    print(index.report())
+
+
+if __name__ == "__main__":
+    main()
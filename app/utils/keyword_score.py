@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/20 10:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：关键词综合得分，以numpy向量化计算。
+# 综合得分 = importance_score * 重要度权重 + 归一化count * 出现次数权重，count在每个关键词列表内做min-max归一化，
+# 列表内count全部相同时归一化值取0.5。只取前k个时用argpartition选出候选，再对这k个排序；
+# 得分相同时保持输入顺序（与sorted的稳定排序一致）。
+# 多个关键词列表可一次批量打分（如对多篇论文的实体列表），归一化仍按各自列表进行。
+
+import logging
+
+import numpy as np
+
+from app.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def _weights(weight_importance, weight_count):
+    if weight_importance is None:
+        weight_importance = settings.KEYWORD_WEIGHT_IMPORTANCE
+    if weight_count is None:
+        weight_count = settings.KEYWORD_WEIGHT_COUNT
+    return weight_importance, weight_count
+
+
+def composite_scores(importance, counts, weight_importance=None, weight_count=None):
+    """
+    计算一个关键词列表的综合得分
+
+    Args:
+        importance (array-like): 重要度得分
+        counts (array-like): 出现次数
+        weight_importance (float): 重要度权重，默认读取配置KEYWORD_WEIGHT_IMPORTANCE
+        weight_count (float): 出现次数权重，默认读取配置KEYWORD_WEIGHT_COUNT
+
+    Returns:
+        np.ndarray: 综合得分
+    """
+    importance = np.asarray(importance, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    if counts.size == 0:
+        return np.zeros(0, dtype=np.float64)
+    return batch_composite_scores(importance, counts, np.array([0]), weight_importance, weight_count)
+
+
+def batch_composite_scores(importance, counts, offsets, weight_importance=None, weight_count=None):
+    """
+    批量计算多个关键词列表的综合得分，各列表首尾相接存放
+
+    Args:
+        importance (np.ndarray): 全部列表的重要度得分
+        counts (np.ndarray): 全部列表的出现次数
+        offsets (np.ndarray): 每个列表在数组中的起始位置（升序，列表不能为空）
+        weight_importance (float): 重要度权重
+        weight_count (float): 出现次数权重
+
+    Returns:
+        np.ndarray: 与输入等长的综合得分
+    """
+    weight_importance, weight_count = _weights(weight_importance, weight_count)
+    lengths = np.diff(np.append(offsets, counts.size))
+    min_counts = np.repeat(np.minimum.reduceat(counts, offsets), lengths)
+    spans = np.repeat(np.maximum.reduceat(counts, offsets), lengths) - min_counts
+
+    # 列表内count全部相同时归一化值取0.5，避免除零
+    normalized = np.full(counts.size, 0.5)
+    np.divide(counts - min_counts, spans, out=normalized, where=spans != 0)
+    return importance * weight_importance + normalized * weight_count
+
+
+def top_k(scores, k=None):
+    """
+    按得分从高到低取前k个下标，得分相同时下标小的在前
+
+    Args:
+        scores (np.ndarray): 得分
+        k (int): 数量，None表示全部
+
+    Returns:
+        np.ndarray: 下标
+    """
+    n = scores.size
+    if k is None or k >= n:
+        return np.lexsort((np.arange(n), -scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+
+    # argpartition找到第k大的得分；高于它的全部入选，等于它的按下标先后补足k个
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:k - above.size]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+
+def score_keyword_lists(keyword_lists, k=None, weight_importance=None, weight_count=None):
+    """
+    批量为多个关键词列表打分并各自取前k个
+
+    Args:
+        keyword_lists (list): 关键词列表的列表，每个关键词包含importance_score和count
+        k (int): 每个列表保留的数量，None表示全部
+        weight_importance (float): 重要度权重
+        weight_count (float): 出现次数权重
+
+    Returns:
+        list: 每个列表按综合得分排序后的关键词（写入composite_score字段）
+    """
+    lengths = np.fromiter((len(keywords) for keywords in keyword_lists), dtype=np.intp, count=len(keyword_lists))
+    flat = [keyword for keywords in keyword_lists for keyword in keywords]
+    if not flat:
+        return [[] for _ in keyword_lists]
+
+    importance = np.fromiter((keyword['importance_score'] for keyword in flat), dtype=np.float64, count=len(flat))
+    counts = np.fromiter((keyword['count'] for keyword in flat), dtype=np.float64, count=len(flat))
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    scores = batch_composite_scores(importance, counts, starts[lengths > 0], weight_importance, weight_count)
+
+    if len(keyword_lists) == 1:
+        orders = [top_k(scores, k)]
+    else:
+        # 一次lexsort完成所有列表的组内排序（列表编号为主键），再截取每个列表的前k个
+        segments = np.repeat(np.arange(len(keyword_lists)), lengths)
+        order = np.lexsort((np.arange(len(flat)), -scores, segments))
+        if k is not None:
+            lengths = np.minimum(lengths, max(k, 0))
+            order = order[np.arange(len(flat)) - np.repeat(starts, np.diff(np.append(starts, len(flat)))) < k]
+        orders = np.split(order, np.cumsum(lengths)[:-1])
+
+    results = []
+    for indices in orders:
+        ranked = []
+        for i in indices.tolist():
+            flat[i]['composite_score'] = float(scores[i])
+            ranked.append(flat[i])
+        results.append(ranked)
+
+    logger.info(f"关键词批量打分: {len(keyword_lists)} 个列表、{len(flat)} 个关键词")
+    return results
+
+
+def score_keywords(keywords, k=None, weight_importance=None, weight_count=None):
+    """
+    为一个关键词列表打分并取前k个
+
+    Args:
+        keywords (list): 关键词列表，每个关键词包含importance_score和count
+        k (int): 保留的数量，None表示全部
+        weight_importance (float): 重要度权重
+        weight_count (float): 出现次数权重
+
+    Returns:
+        list: 按综合得分排序后的关键词（写入composite_score字段）
+    """
+    return score_keyword_lists([keywords], k, weight_importance, weight_count)[0]
@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/15 09:40
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：本地PDF转Markdown引擎（依赖PyMuPDF，未安装时本地转换不可用）。
+# 读取PDF文本层，按字号识别标题层级（正文字号取字符数最多的字号），按文本块重建段落并合并行尾连字符。
+# 转换在大小为CPU核数的进程池中执行，接口与 pdf2md_mineruapi 一致，不需要网络。
+#
+# 批量转换: python -m app.utils.local_pdf2md a.pdf b.pdf --output out/
+
+import argparse
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+
+from app.core.config import settings
+from app.utils.conversion_cache import cached_convert
+
+try:
+    import pymupdf
+except ImportError:
+    try:
+        import fitz as pymupdf
+    except ImportError:
+        pymupdf = None
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 转换缓存中本地引擎结果的版本标识，标题/段落规则变化时递增
+LOCAL_CONVERTER_VERSION = "local-pymupdf/1"
+
+# 字号至少为正文的多少倍才视为标题；最多区分的标题层级数
+HEADING_SIZE_RATIO = 1.15
+MAX_HEADING_LEVELS = 3
+
+# 单独成块的页码
+_PAGE_NUMBER_PATTERN = re.compile(r'^\s*(?:page\s*)?\d{1,4}\s*$', re.IGNORECASE)
+
+
+def local_engine_available():
+    """
+    本地引擎是否可用（是否安装了PyMuPDF）
+
+    Returns:
+        bool: 可用返回True
+    """
+    return pymupdf is not None
+
+
+def pdf_page_count(pdf_path):
+    """
+    获取PDF页数
+
+    Args:
+        pdf_path (str): PDF文件路径
+
+    Returns:
+        int: 页数，无法读取返回None
+    """
+    if pymupdf is None:
+        return None
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"读取PDF页数失败: {pdf_path} ({e})")
+        return None
+
+
+def _block_lines(block):
+    """返回文本块中每一行的(文本, 字号)，字号取该行字符数最多的span字号"""
+    lines = []
+    for line in block.get("lines", []):
+        spans = [span for span in line.get("spans", []) if span.get("text", "").strip()]
+        if not spans:
+            continue
+        text = "".join(span["text"] for span in spans).strip()
+        size = max(spans, key=lambda span: len(span["text"]))["size"]
+        lines.append((text, round(size, 1)))
+    return lines
+
+
+def _join_lines(lines):
+    """把块内的行合并为一个段落，行尾连字符直接拼接"""
+    paragraph = ""
+    for text in lines:
+        if paragraph.endswith("-") and text[:1].islower():
+            paragraph = paragraph[:-1] + text
+        elif paragraph:
+            paragraph += " " + text
+        else:
+            paragraph = text
+    return paragraph
+
+
+def extract_markdown(pdf_path):
+    """
+    从PDF文本层重建Markdown（在工作进程中执行）
+
+    Args:
+        pdf_path (str): PDF文件路径
+
+    Returns:
+        tuple: (Markdown文本, 页数)
+    """
+    with pymupdf.open(pdf_path) as doc:
+        pages = [page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"] for page in doc]
+        page_count = doc.page_count
+
+    blocks = [_block_lines(block) for page_blocks in pages for block in page_blocks if block.get("type") == 0]
+    blocks = [lines for lines in blocks if lines]
+
+    # 正文字号：按字符数加权的众数
+    size_chars = Counter()
+    for lines in blocks:
+        for text, size in lines:
+            size_chars[size] += len(text)
+    if not size_chars:
+        return "", page_count
+    body_size = size_chars.most_common(1)[0][0]
+
+    # 比正文大的字号从大到小依次对应 #、##、###，其余更小的标题字号都归为最低一级
+    heading_sizes = sorted((size for size in size_chars if size >= body_size * HEADING_SIZE_RATIO), reverse=True)
+    heading_level = {size: min(i, MAX_HEADING_LEVELS - 1) + 1 for i, size in enumerate(heading_sizes)}
+
+    parts = []
+    for lines in blocks:
+        paragraph = _join_lines([text for text, _ in lines])
+        if _PAGE_NUMBER_PATTERN.match(paragraph):
+            continue
+        # 整块字号一致且为标题字号、长度不像正文时作为标题
+        sizes = {size for _, size in lines}
+        if len(sizes) == 1 and next(iter(sizes)) in heading_level and len(paragraph) <= 200:
+            parts.append(f"{'#' * heading_level[next(iter(sizes))]} {paragraph}")
+        else:
+            parts.append(paragraph)
+    return "\n\n".join(parts) + "\n", page_count
+
+
+def _convert_worker(pdf_path, md_file_path):
+    """工作进程入口：转换并写出Markdown文件"""
+    markdown, page_count = extract_markdown(pdf_path)
+    with open(md_file_path, 'w', encoding='utf-8') as f:
+        f.write(markdown)
+    return md_file_path, page_count
+
+
+class LocalPdfConverter:
+    """进程池中的本地PDF转换器"""
+
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        Args:
+            max_workers (int): 进程数，默认CPU核数
+            timeout (float): convert等待单个PDF转换结果的最长秒数，None表示不限
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # 调用方是多线程的celery worker，fork会把其他线程持有的锁一并复制进子进程，改用forkserver（Windows上为spawn）
+                start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context(start_method))
+            return self._executor
+
+    def submit(self, pdf_path, output_path):
+        """
+        提交一个PDF转换
+
+        Args:
+            pdf_path (str): PDF文件路径
+            output_path (str): 输出路径
+
+        Returns:
+            Future: 结果为(Markdown文件路径, 页数)
+        """
+        if pymupdf is None:
+            raise RuntimeError("本地PDF转换需要安装PyMuPDF")
+        os.makedirs(output_path, exist_ok=True)
+        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        future = self._get_executor().submit(_convert_worker, pdf_path, os.path.join(output_path, f"{pdf_name}.md"))
+        future.pdf_path = pdf_path
+        return future
+
+    def convert(self, pdf_path, output_path):
+        """
+        转换单个PDF，接口与 pdf2md_mineruapi 一致
+
+        Args:
+            pdf_path (str): PDF文件路径
+            output_path (str): 输出路径
+
+        Returns:
+            str: 转换后的Markdown文件路径，如果失败或超时返回None
+        """
+        try:
+            md_file_path, _ = self.submit(pdf_path, output_path).result(timeout=self.timeout)
+            return md_file_path
+        except TimeoutError:
+            print(f"本地PDF转换超时（{self.timeout}s）: {pdf_path}")
+            return None
+        except Exception as e:
+            print(f"本地PDF转换失败: {e}")
+            return None
+
+    def convert_many(self, pdf_paths, output_path):
+        """
+        批量转换，按完成先后依次返回结果
+
+        Args:
+            pdf_paths (list): PDF文件路径列表
+            output_path (str): 输出路径
+
+        Yields:
+            tuple: (PDF文件路径, Markdown文件路径或None)
+        """
+        futures = [self.submit(pdf_path, output_path) for pdf_path in pdf_paths]
+        for future in as_completed(futures):
+            try:
+                yield future.pdf_path, future.result()[0]
+            except Exception as e:
+                print(f"本地PDF转换失败: {future.pdf_path} ({e})")
+                yield future.pdf_path, None
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def get_local_converter():
+    """
+    获取进程内共享的本地转换器
+
+    Returns:
+        LocalPdfConverter: 转换器实例
+    """
+    global _converter
+    with _converter_lock:
+        if _converter is None:
+            _converter = LocalPdfConverter(max_workers=settings.LOCAL_PDF2MD_WORKERS or None,
+                                           timeout=settings.LOCAL_PDF2MD_TIMEOUT or None)
+        return _converter
+
+
+def pdf2md_local(pdf_path, output_path):
+    """
+    使用本地引擎将PDF转换为Markdown，先查转换缓存
+
+    Args:
+        pdf_path (str): PDF文件路径
+        output_path (str): 输出路径
+
+    Returns:
+        str: 转换后的Markdown文件路径，如果失败返回None
+    """
+    if pymupdf is None:
+        print("本地PDF转换需要安装PyMuPDF")
+        return None
+    return cached_convert(pdf_path, output_path, LOCAL_CONVERTER_VERSION, get_local_converter().convert)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地PDF转Markdown")
+    parser.add_argument("pdfs", nargs="+", help="PDF文件路径")
+    parser.add_argument("--output", required=True, help="输出目录")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认CPU核数")
+    args = parser.parse_args()
+
+    converter = LocalPdfConverter(max_workers=args.workers)
+    start = time.time()
+    converted = 0
+    for pdf_path, md_file_path in converter.convert_many(args.pdfs, args.output):
+        converted += md_file_path is not None
+    converter.close()
+
+    elapsed = time.time() - start
+    print(f"转换 {converted}/{len(args.pdfs)} 篇，耗时 {elapsed:.1f}s，"
+          f"{converted / elapsed * 60 if elapsed else 0:.0f} 篇/分钟（{converter.max_workers} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
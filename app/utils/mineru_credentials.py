@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/13 10:20
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：MinerU API凭证池。
+# 启动后第一次使用时读取一次 OUTPUT_PATH/mineruapi.xlsx 的全部行（api_url、api_key，可选quota列为每日转换次数上限），
+# 之后按轮询顺序分配密钥；每个密钥有并发上限，连续出错后暂停使用一段时间，当日配额用完后跳过。
+# 分配密钥从不阻塞：没有空闲密钥时返回None，由调用方（转换管理器）排队等待release()。
+
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+from app.core.config import OUTPUT_PATH, settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+def load_mineru_credentials(excel_path=None):
+    """
+    读取MinerU凭证表的全部行
+
+    Args:
+        excel_path (str): Excel路径，默认 OUTPUT_PATH/mineruapi.xlsx
+
+    Returns:
+        list: [{"api_url", "api_key", "quota"}]，quota为0表示不限，读取失败返回空列表
+    """
+    # pandas只在加载凭证时用到一次，不放在模块顶层导入
+    import pandas as pd
+
+    excel_path = excel_path or os.path.join(OUTPUT_PATH, 'mineruapi.xlsx')
+    try:
+        df = pd.read_excel(excel_path)
+    except FileNotFoundError:
+        print(f"Excel文件不存在: {excel_path}")
+        return []
+    except Exception as e:
+        print(f"读取Excel文件失败: {e}")
+        return []
+
+    credentials = []
+    for row in df.to_dict('records'):
+        api_url, api_key = row.get('api_url'), row.get('api_key')
+        if pd.isna(api_url) or pd.isna(api_key):
+            continue
+        quota = row.get('quota', 0)
+        credentials.append({
+            "api_url": str(api_url).rstrip('/'),
+            "api_key": str(api_key),
+            "quota": 0 if pd.isna(quota) else int(quota),
+        })
+    if not credentials:
+        print("Excel文件为空")
+    return credentials
+
+
+class _KeyState:
+    """单个密钥的使用情况"""
+
+    def __init__(self, api_url, api_key, quota=0):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.quota = quota
+        self.in_flight = 0
+        self.used_today = 0
+        self.day = date.today()
+        self.successes = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.disabled_until = 0.0
+
+    def usable(self, now, max_in_flight):
+        if self.day != date.today():
+            self.day = date.today()
+            self.used_today = 0
+        if self.in_flight >= max_in_flight or now < self.disabled_until:
+            return False
+        # 已分配但尚未提交的任务先占用配额，提交成功后才计入当日用量
+        return not self.quota or self.used_today + self.in_flight < self.quota
+
+
+class MineruCredentialPool:
+    """
+    MinerU凭证池
+
+    实例可直接作为MineruConversionManager的credentials_provider：
+    调用实例（即try_acquire()）得到(api_url, api_key)，转换结束后由管理器调用release()归还。
+    """
+
+    def __init__(self, credentials, max_in_flight=2, failure_threshold=3, cooldown=300):
+        """
+        Args:
+            credentials (list): load_mineru_credentials() 的返回值
+            max_in_flight (int): 每个密钥同时进行的转换任务上限
+            failure_threshold (int): 连续出错多少次后暂停该密钥
+            cooldown (float): 暂停秒数
+        """
+        self.max_in_flight = max_in_flight
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._keys = [_KeyState(c["api_url"], c["api_key"], c.get("quota", 0)) for c in credentials]
+        self._by_credentials = {(k.api_url, k.api_key): k for k in self._keys}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __call__(self):
+        return self.try_acquire()
+
+    def _pick(self, now):
+        """从上次分配的位置之后轮询查找可用密钥"""
+        for offset in range(len(self._keys)):
+            index = (self._next + offset) % len(self._keys)
+            key = self._keys[index]
+            if key.usable(now, self.max_in_flight):
+                self._next = index + 1
+                return key
+        return None
+
+    def try_acquire(self):
+        """
+        分配一个可用密钥，不等待
+
+        Returns:
+            tuple: (api_url, api_key)，当前没有可用密钥返回None
+        """
+        with self._lock:
+            key = self._pick(time.time())
+            if key is None:
+                return None
+            key.in_flight += 1
+            return key.api_url, key.api_key
+
+    def busy(self):
+        """
+        是否有密钥正被占用；为False且try_acquire()返回None时，说明密钥全部暂停或配额用完，等待没有意义
+
+        Returns:
+            bool: 有进行中的任务返回True
+        """
+        with self._lock:
+            return any(k.in_flight for k in self._keys)
+
+    def release(self, credentials, success=True, submitted=True):
+        """
+        归还密钥并记录本次转换结果
+
+        Args:
+            credentials (tuple): try_acquire() 返回的(api_url, api_key)
+            success (bool): 转换是否成功
+            submitted (bool): 任务是否已提交到MinerU（拿到task_id），未提交的不计入当日配额
+        """
+        with self._lock:
+            key = self._by_credentials.get(tuple(credentials[:2]))
+            if key is None:
+                return
+            key.in_flight = max(key.in_flight - 1, 0)
+            if submitted:
+                key.used_today += 1
+            if success:
+                key.successes += 1
+                key.consecutive_errors = 0
+            else:
+                key.errors += 1
+                key.consecutive_errors += 1
+                if key.consecutive_errors >= self.failure_threshold:
+                    key.disabled_until = time.time() + self.cooldown
+                    key.consecutive_errors = 0
+                    logger.warning(f"MinerU密钥 ...{key.api_key[-4:]} 连续出错，暂停 {self.cooldown} 秒")
+
+    def report(self):
+        """
+        获取各密钥的使用情况
+
+        Returns:
+            list: 每个密钥的并发数、当日用量、配额、成功/出错次数和是否暂停
+        """
+        now = time.time()
+        with self._lock:
+            return [{
+                "api_url": k.api_url,
+                "api_key": f"...{k.api_key[-4:]}",
+                "in_flight": k.in_flight,
+                "used_today": k.used_today,
+                "quota": k.quota,
+                "successes": k.successes,
+                "errors": k.errors,
+                "paused": now < k.disabled_until,
+            } for k in self._keys]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool():
+    """
+    获取进程内共享的凭证池，第一次调用时读取Excel
+
+    Returns:
+        MineruCredentialPool: 凭证池
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = MineruCredentialPool(load_mineru_credentials(),
+                                         max_in_flight=settings.MINERU_KEY_MAX_IN_FLIGHT,
+                                         failure_threshold=settings.MINERU_KEY_FAILURE_THRESHOLD,
+                                         cooldown=settings.MINERU_KEY_COOLDOWN)
+            logger.info(f"已加载 {len(_pool)} 个MinerU密钥")
+        return _pool
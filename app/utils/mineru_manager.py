@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/12 14:50
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：MinerU批量转换管理器。
+# 多个PDF同时上传提交，所有未完成的转换任务由同一个轮询线程跟踪；
+# 每个任务的轮询间隔按指数退避增长，状态变化时重置，转换完成后立即交回结果。
+# 密钥由轮询线程以非阻塞方式分配，没有空闲密钥的提交在队列中等待，工作线程从不因等待密钥而阻塞。
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+from app.core.config import settings
+from app.utils.mineru_credentials import get_credential_pool
+from app.utils.pdf_to_md import mineru_submit, mineru_status, mineru_fetch_result
+
+
+class _PendingConversion:
+    """一个已提交、尚未完成的转换任务"""
+
+    def __init__(self, pdf_path, output_path, task_id, credentials, future, interval, queued_at):
+        self.pdf_path = pdf_path
+        self.output_path = output_path
+        self.task_id = task_id
+        self.credentials = credentials
+        self.future = future
+        self.interval = interval
+        self.next_poll = time.time() + interval
+        # 超时从进入排队时算起，包含等待密钥的时间
+        self.submitted_at = queued_at
+        self.last_status = None
+
+
+class MineruConversionManager:
+    """
+    MinerU转换管理器
+
+    submit() 立即返回Future；上传/提交、状态查询和结果下载都在工作线程池中执行，
+    轮询线程只负责分配密钥和调度到期的状态查询。
+    """
+
+    def __init__(self, credentials_provider=None, max_workers=4, initial_interval=1.0,
+                 max_interval=30.0, backoff=1.6, timeout=1800):
+        """
+        Args:
+            credentials_provider (callable): 返回(api_url, api_key)的函数，不能阻塞，暂无可用密钥时返回None；
+                若带有release方法，转换结束时调用release(credentials, success, submitted)。默认使用共享凭证池
+            max_workers (int): 上传/查询/下载的并发线程数
+            initial_interval (float): 首次轮询间隔（秒）
+            max_interval (float): 轮询间隔上限（秒）
+            backoff (float): 状态未变化时轮询间隔的增长倍数
+            timeout (float): 单个转换任务从提交到完成的超时时间（秒），包含排队等待密钥的时间
+        """
+        self.credentials_provider = credentials_provider or get_credential_pool()
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mineru")
+        self._waiting = deque()
+        self._pending = []
+        self._in_flight = set()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._poller = threading.Thread(target=self._poll_loop, name="mineru-poller", daemon=True)
+        self._poller.start()
+
+    def submit(self, pdf_path, output_path):
+        """
+        提交一个PDF转换
+
+        Args:
+            pdf_path (str): PDF文件路径
+            output_path (str): 输出路径
+
+        Returns:
+            Future: 结果为Markdown文件路径，失败为None
+        """
+        future = Future()
+        future.pdf_path = pdf_path
+        with self._condition:
+            if self._closed:
+                future.set_result(None)
+                return future
+            self._waiting.append((pdf_path, output_path, future, time.time()))
+            self._condition.notify_all()
+        return future
+
+    def convert_many(self, pdf_paths, output_path):
+        """
+        批量提交PDF转换，按完成先后依次返回结果
+
+        Args:
+            pdf_paths (list): PDF文件路径列表
+            output_path (str): 输出路径
+
+        Yields:
+            tuple: (PDF文件路径, Markdown文件路径或None)
+        """
+        futures = [self.submit(pdf_path, output_path) for pdf_path in pdf_paths]
+        for future in as_completed(futures):
+            yield future.pdf_path, future.result()
+
+    def pending_count(self):
+        """当前等待密钥和正在轮询的转换任务数"""
+        with self._condition:
+            return len(self._waiting) + len(self._pending) + len(self._in_flight)
+
+    def close(self):
+        """停止轮询线程，未完成的任务以None结束"""
+        with self._condition:
+            self._closed = True
+            pending, self._pending = self._pending, []
+            waiting, self._waiting = list(self._waiting), deque()
+            self._condition.notify_all()
+        for _, _, future, _ in waiting:
+            future.set_result(None)
+        for conversion in pending:
+            self._release(conversion.credentials, success=False)
+            conversion.future.set_result(None)
+        self._executor.shutdown(wait=False)
+
+    def _submit_one(self, pdf_path, output_path, future, credentials, queued_at):
+        try:
+            self._submit_step(pdf_path, output_path, future, credentials, queued_at)
+        except Exception as e:
+            print(f"提交MinerU转换失败: {e}")
+            if not future.done():
+                future.set_result(None)
+
+    def _submit_step(self, pdf_path, output_path, future, credentials, queued_at):
+        try:
+            api_url, api_key = credentials[:2]
+            task_id = mineru_submit(pdf_path, api_url, api_key)
+        except Exception as e:
+            print(f"提交MinerU转换失败: {e}")
+            task_id = None
+        if not task_id:
+            self._release(credentials, success=False, submitted=False)
+            future.set_result(None)
+            return
+
+        print(f"\033[1;32m | INFO     | MinerU转换已提交: {pdf_path} (task_id: {task_id}) \033[0m")
+        conversion = _PendingConversion(pdf_path, output_path, task_id, credentials, future, self.initial_interval,
+                                        queued_at)
+        with self._condition:
+            closed = self._closed
+            if not closed:
+                self._pending.append(conversion)
+                self._condition.notify_all()
+        if closed:
+            self._release(credentials, success=False)
+            future.set_result(None)
+
+    def _release(self, credentials, success, submitted=True):
+        """转换结束时归还密钥（凭证池用于统计配额和错误），并唤醒轮询线程分配给排队的提交"""
+        release = getattr(self.credentials_provider, 'release', None)
+        if release is not None:
+            release(credentials, success=success, submitted=submitted)
+        with self._condition:
+            self._condition.notify_all()
+
+    def _dispatch_waiting(self, now):
+        """
+        为排队的提交分配密钥并交给工作线程；须持有self._condition
+
+        Returns:
+            list: 无法再获得密钥、需要以None结束的Future
+        """
+        failed = []
+        while self._waiting:
+            pdf_path, output_path, future, queued_at = self._waiting[0]
+            try:
+                credentials = self.credentials_provider()
+            except Exception as e:
+                print(f"获取MinerU密钥失败: {e}")
+                credentials = None
+            if credentials:
+                self._waiting.popleft()
+                self._executor.submit(self._submit_one, pdf_path, output_path, future, credentials, queued_at)
+                continue
+
+            # 没有空闲密钥：仍有任务占用密钥时继续排队等待归还，否则（全部暂停、配额用完或未配置）直接失败
+            busy = getattr(self.credentials_provider, 'busy', None)
+            if busy is not None and busy():
+                while self._waiting and now - self._waiting[0][3] > self.timeout:
+                    failed.append(self._waiting.popleft()[2])
+                break
+            print("没有可用的MinerU密钥")
+            failed.extend(item[2] for item in self._waiting)
+            self._waiting.clear()
+        return failed
+
+    def _poll_loop(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.time()
+                    failed = self._dispatch_waiting(now)
+                    due = [c for c in self._pending if c.next_poll <= now]
+                    if due or failed:
+                        break
+                    wait = min((c.next_poll for c in self._pending), default=now + 60) - now
+                    if self._waiting:
+                        # 排队的提交由release()唤醒；定期复查以处理排队超时
+                        wait = min(wait, 1.0)
+                    self._condition.wait(timeout=max(wait, 0.01))
+                if self._closed:
+                    return
+                for conversion in due:
+                    self._pending.remove(conversion)
+                    self._in_flight.add(conversion)
+
+            for future in failed:
+                future.set_result(None)
+            for conversion in due:
+                self._executor.submit(self._poll_one, conversion)
+
+    def _reschedule(self, conversion):
+        with self._condition:
+            self._in_flight.discard(conversion)
+            closed = self._closed
+            if not closed:
+                conversion.next_poll = time.time() + conversion.interval
+                self._pending.append(conversion)
+                self._condition.notify_all()
+        if closed:
+            self._release(conversion.credentials, success=False)
+            conversion.future.set_result(None)
+
+    def _finish(self, conversion, md_path):
+        with self._condition:
+            self._in_flight.discard(conversion)
+        if conversion.future.done():
+            return
+        try:
+            self._release(conversion.credentials, success=md_path is not None)
+        finally:
+            elapsed = time.time() - conversion.submitted_at
+            if md_path:
+                print(f"\033[1;32m | INFO     | MinerU转换完成: {md_path} ({elapsed:.1f}s) \033[0m")
+            conversion.future.set_result(md_path)
+
+    def _poll_one(self, conversion):
+        # 任何异常（如状态接口返回非JSON对象、下载结果出错）都以None结束，保证Future一定会完成
+        try:
+            self._poll_step(conversion)
+        except Exception as e:
+            print(f"跟踪MinerU转换失败: {e}")
+            self._finish(conversion, None)
+
+    def _poll_step(self, conversion):
+        api_url, api_key = conversion.credentials[:2]
+        try:
+            status_result = mineru_status(conversion.task_id, api_url, api_key)
+        except Exception as e:
+            print(f"查询转换状态失败: {e}")
+            self._finish(conversion, None)
+            return
+
+        status = status_result.get('status')
+        if status == 'completed':
+            self._finish(conversion, mineru_fetch_result(status_result, conversion.pdf_path, conversion.output_path))
+            return
+        if status == 'failed':
+            print(f"转换失败: {conversion.pdf_path}")
+            self._finish(conversion, None)
+            return
+        if time.time() - conversion.submitted_at > self.timeout:
+            print(f"转换超时: {conversion.pdf_path}")
+            self._finish(conversion, None)
+            return
+
+        # 状态有变化说明任务在推进，缩短间隔；否则指数退避
+        if status != conversion.last_status:
+            conversion.interval = self.initial_interval
+        else:
+            conversion.interval = min(conversion.interval * self.backoff, self.max_interval)
+        conversion.last_status = status
+        self._reschedule(conversion)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_conversion_manager():
+    """
+    获取进程内共享的MinerU转换管理器
+
+    Returns:
+        MineruConversionManager: 管理器实例
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = MineruConversionManager(max_workers=settings.MINERU_MAX_WORKERS,
+                                               initial_interval=settings.MINERU_POLL_INITIAL,
+                                               max_interval=settings.MINERU_POLL_MAX,
+                                               timeout=settings.MINERU_TASK_TIMEOUT)
+        return _manager
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/21 10:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：磁盘对象存储基类，DiskCache（转换缓存、压缩结果缓存）和PdfStore（PDF仓库）共用。
+# 对象文件存放在 <root>/objects 下，sqlite索引（index.sqlite）记录每个对象的大小、写入时间和最近访问时间，
+# 总大小超过上限时按最近访问时间淘汰；命中/未命中等计数持久化在stats表中。
+# 子类决定对象路径、索引表名和键列名（保持各自已有的索引文件格式）。
+
+import abc
+import argparse
+import logging
+import os
+import sqlite3
+import time
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+
+class ObjectStore(abc.ABC):
+    """对象目录 + sqlite索引，按大小做LRU淘汰"""
+
+    # 索引表名、键列名、子类追加的建表语句、日志中的名称
+    table = "objects"
+    key_column = "key"
+    extra_schema = ""
+    label = "存储"
+
+    def __init__(self, root, max_bytes=0):
+        """
+        Args:
+            root (str): 存储目录
+            max_bytes (int): 对象总大小上限，0表示不限
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db_path = os.path.join(root, "index.sqlite")
+        with self._connect() as conn:
+            conn.executescript(f"""
+CREATE TABLE IF NOT EXISTS {self.table} (
+    {self.key_column} TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+{self.extra_schema}""")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @abc.abstractmethod
+    def _object_path(self, key):
+        """对象文件路径"""
+
+    @staticmethod
+    def _incr(conn, name, value=1):
+        conn.execute("INSERT INTO stats(name, value) VALUES(?, ?) "
+                     "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, value))
+
+    def _total_bytes(self, conn):
+        return conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _touch(self, conn, key):
+        conn.execute(f"UPDATE {self.table} SET last_access = ? WHERE {self.key_column} = ?", (time.time(), key))
+
+    def _record(self, conn, key, size):
+        """
+        记录新写入的对象
+
+        Returns:
+            int: 写入后的总大小
+        """
+        now = time.time()
+        conn.execute(f"INSERT OR REPLACE INTO {self.table}({self.key_column}, size, created_at, last_access) "
+                     f"VALUES(?, ?, ?, ?)", (key, size, now, now))
+        return self._total_bytes(conn)
+
+    def _remove(self, conn, key):
+        """删除对象文件及其索引"""
+        try:
+            os.remove(self._object_path(key))
+        except FileNotFoundError:
+            pass
+        conn.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = ?", (key,))
+
+    def evict(self, max_bytes=None):
+        """
+        按最近访问时间淘汰，直到总大小不超过上限
+
+        Args:
+            max_bytes (int): 大小上限，默认使用构造时的max_bytes
+
+        Returns:
+            int: 淘汰的字节数
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        freed = 0
+        with self._connect() as conn:
+            total = self._total_bytes(conn)
+            rows = conn.execute(f"SELECT {self.key_column}, size FROM {self.table} ORDER BY last_access").fetchall()
+            for key, size in rows:
+                if total <= max_bytes:
+                    break
+                self._remove(conn, key)
+                total -= size
+                freed += size
+            if freed:
+                self._incr(conn, "evicted_bytes", freed)
+
+        if freed:
+            logger.info(f"{self.label} {self.root} 淘汰 {freed / 1024 / 1024:.1f} MB，当前 {total / 1024 / 1024:.1f} MB")
+        return freed
+
+    def stats(self):
+        """
+        获取统计信息
+
+        Returns:
+            dict: 对象数（键为索引表名）、总大小、命中/未命中次数、命中率、淘汰的字节数，以及stats表中的其他计数
+        """
+        with self._connect() as conn:
+            entries, total = conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}").fetchone()
+            counters = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        hits, misses = counters.pop("hits", 0), counters.pop("misses", 0)
+        return {
+            self.table: entries,
+            "total_bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evicted_bytes": counters.pop("evicted_bytes", 0),
+            **counters,
+        }
+
+
+def build_cli(description, evict_command="evict", evict_help="按大小上限淘汰", ttl=False):
+    """
+    生成存储维护命令行（stats和淘汰子命令），调用方可继续添加子命令
+
+    Args:
+        description (str): 命令行说明
+        evict_command (str): 淘汰子命令的名称
+        evict_help (str): 淘汰子命令的说明
+        ttl (bool): 淘汰子命令是否支持--ttl
+
+    Returns:
+        tuple: (parser, subparsers)
+    """
+    parser = argparse.ArgumentParser(description=description)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="输出统计信息")
+    evict_parser = subparsers.add_parser(evict_command, help=evict_help)
+    evict_parser.add_argument("--max-bytes", type=int, default=None, help="大小上限，默认读取配置")
+    if ttl:
+        evict_parser.add_argument("--ttl", type=float, default=None, help="有效秒数，默认读取配置")
+    parser.set_defaults(evict_command=evict_command)
+    return parser, subparsers
+
+
+def run_cli(store, args):
+    """
+    执行build_cli生成的淘汰子命令，并输出统计信息
+
+    Args:
+        store (ObjectStore): 存储实例
+        args (argparse.Namespace): 解析后的参数
+    """
+    if args.command == args.evict_command:
+        if hasattr(args, "ttl"):
+            # 先删除过期条目，仍超限时再按最近访问时间淘汰
+            store.expire(args.ttl)
+        store.evict(args.max_bytes)
+    print(store.stats())
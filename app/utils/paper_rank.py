@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/3 15:40
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：候选论文在下载前的BM25重排序，标题+摘要打分全部以numpy向量化完成。
+
+import logging
+
+import numpy as np
+
+from app.utils.arxiv_mirror import tokenize, BM25_K1, BM25_B
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 标题词项的重复次数（简化版BM25F，标题命中比摘要命中更重要）
+TITLE_BOOST = 2
+
+
+def bm25_matrix(documents, query_terms, k1=BM25_K1, b=BM25_B):
+    """
+    计算每篇文档对每个查询词项的BM25得分
+
+    Args:
+        documents (list): 每篇文档的词项列表
+        query_terms (list): 查询词项（去重后）
+        k1 (float): BM25参数k1
+        b (float): BM25参数b
+
+    Returns:
+        np.ndarray: 形状为(文档数, 词项数)的得分矩阵
+    """
+    n_docs, n_terms = len(documents), len(query_terms)
+    if n_docs == 0 or n_terms == 0:
+        return np.zeros((n_docs, n_terms), dtype=np.float64)
+
+    term_index = {term: i for i, term in enumerate(query_terms)}
+    doc_lengths = np.fromiter((len(doc) for doc in documents), dtype=np.float64, count=n_docs)
+
+    # 只统计查询词项的词频，稀疏坐标一次性累加
+    rows, cols = [], []
+    for row, doc in enumerate(documents):
+        for token in doc:
+            col = term_index.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    tf = np.zeros((n_docs, n_terms), dtype=np.float64)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    doc_freq = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    avg_length = doc_lengths.mean() or 1.0
+    norm = k1 * (1 - b + b * doc_lengths / avg_length)
+    return idf * tf * (k1 + 1) / (tf + norm[:, None])
+
+
+def score_papers(papers, keyword, related_keywords=None, related_weight=0.5):
+    """
+    以关键词和相关关键词对论文的标题+摘要打分
+
+    Args:
+        papers (list): 论文信息字典列表（get_papers返回结构）
+        keyword (str): 主关键词
+        related_keywords (list): 相关关键词列表
+        related_weight (float): 相关关键词词项的权重
+
+    Returns:
+        np.ndarray: 每篇论文的得分
+    """
+    documents = [tokenize(paper.get('title', '')) * TITLE_BOOST + tokenize(paper.get('abstract', ''))
+                 for paper in papers]
+
+    weights = {}
+    for term in tokenize(keyword):
+        weights[term] = 1.0
+    for related in related_keywords or []:
+        for term in tokenize(related):
+            weights.setdefault(term, related_weight)
+
+    query_terms = list(weights)
+    term_weights = np.fromiter((weights[t] for t in query_terms), dtype=np.float64, count=len(query_terms))
+    return bm25_matrix(documents, query_terms) @ term_weights
+
+
+def rerank_papers(papers, keyword, related_keywords=None, top_k=None, related_weight=0.5):
+    """
+    对候选论文重排序，只保留得分最高的top_k篇
+
+    得分相同时，先比较跨关键词命中次数（match_count），再保持原有的arXiv相关度顺序。
+
+    Args:
+        papers (list): 候选论文列表
+        keyword (str): 主关键词
+        related_keywords (list): 相关关键词列表
+        top_k (int): 保留的论文数量，None表示全部保留
+        related_weight (float): 相关关键词词项的权重
+
+    Returns:
+        list: 重排序后的论文列表，每篇论文附带rank_score字段
+    """
+    if not papers:
+        return []
+
+    scores = score_papers(papers, keyword, related_keywords, related_weight)
+    match_counts = np.fromiter((paper.get('match_count', 1) for paper in papers), dtype=np.float64,
+                               count=len(papers))
+    # lexsort以最后一个键为主键
+    order = np.lexsort((np.arange(len(papers)), -match_counts, -scores))
+    if top_k is not None:
+        order = order[:top_k]
+
+    ranked = []
+    for i in order:
+        paper = papers[i]
+        paper['rank_score'] = float(scores[i])
+        ranked.append(paper)
+
+    logger.info(f"候选论文重排序: {len(papers)} 篇 -> 保留 {len(ranked)} 篇")
+    return ranked
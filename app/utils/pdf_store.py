@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/5 11:20
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：全局内容寻址PDF仓库。
+# PDF按SHA-256存放在 objects/<前两位>/<sha256>.pdf，论文键（规范化的arXiv ID/DOI）通过sqlite索引指向对象；
+# 各主题目录下的PDF是仓库对象的硬链接（跨设备时退化为复制），同一论文只需下载一次。
+#
+# 统计: python -m app.utils.pdf_store stats
+# 回收: python -m app.utils.pdf_store gc --max-bytes 10000000000
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+from app.core.config import OUTPUT_PATH, settings
+from app.utils.arxiv_api import normalize_arxiv_id, normalize_doi
+from app.utils.object_store import ObjectStore, build_cli, run_cli
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+def paper_store_key(doi):
+    """
+    生成论文在仓库中的键，arXiv论文统一用arXiv ID，其余用规范化DOI
+
+    Args:
+        doi (str): DOI或arXiv ID
+
+    Returns:
+        str: 仓库键，无法识别时返回None
+    """
+    doi = normalize_doi(doi)
+    if not doi:
+        return None
+    if "arxiv" in doi or not doi.startswith("10."):
+        arxiv_id = normalize_arxiv_id(doi)
+        if arxiv_id:
+            return f"arxiv:{arxiv_id}"
+    return f"doi:{doi}"
+
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """
+    计算文件的SHA-256
+
+    Args:
+        file_path (str): 文件路径
+        chunk_size (int): 读取块大小
+
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(src, dest):
+    """
+    以硬链接方式把文件放到目标位置，跨设备等无法链接时复制
+
+    Args:
+        src (str): 源文件
+        dest (str): 目标路径
+    """
+    if os.path.exists(dest):
+        if os.path.samefile(src, dest):
+            return
+        os.remove(dest)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+class PdfStore(ObjectStore):
+    """内容寻址的PDF仓库"""
+
+    table = "objects"
+    key_column = "sha256"
+    extra_schema = """
+CREATE TABLE IF NOT EXISTS refs (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+"""
+    label = "PDF仓库"
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    def _remove(self, conn, sha256):
+        # 主题目录中的硬链接不受影响，只是之后无法再被其他主题复用
+        conn.execute("DELETE FROM refs WHERE sha256 = ?", (sha256,))
+        super()._remove(conn, sha256)
+
+    def lookup(self, doi):
+        """
+        查找论文对应的仓库对象
+
+        Args:
+            doi (str): DOI或arXiv ID
+
+        Returns:
+            str: 仓库对象路径，未命中返回None
+        """
+        key = paper_store_key(doi)
+        if key is None:
+            return None
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT r.sha256, o.size FROM refs r JOIN objects o ON o.sha256 = r.sha256 "
+                               "WHERE r.key = ?", (key,)).fetchone()
+            if row is not None and os.path.exists(self._object_path(row[0])):
+                self._touch(conn, row[0])
+                self._incr(conn, "hits")
+                self._incr(conn, "bytes_saved", row[1])
+                return self._object_path(row[0])
+
+            if row is not None:
+                # 索引存在但对象文件已丢失
+                conn.execute("DELETE FROM refs WHERE key = ?", (key,))
+            self._incr(conn, "misses")
+            return None
+
+    def materialize(self, doi, dest_path):
+        """
+        仓库命中时把PDF链接到目标路径，不发起任何网络请求
+
+        Args:
+            doi (str): DOI或arXiv ID
+            dest_path (str): 目标路径（主题目录下的PDF路径）
+
+        Returns:
+            str: 目标路径，未命中返回None
+        """
+        object_path = self.lookup(doi)
+        if object_path is None:
+            return None
+        link_or_copy(object_path, dest_path)
+        return dest_path
+
+    def put(self, doi, file_path):
+        """
+        把下载好的PDF放入仓库，并让原文件成为仓库对象的硬链接
+
+        Args:
+            doi (str): DOI或arXiv ID
+            file_path (str): 已通过校验的PDF路径
+
+        Returns:
+            str: 仓库对象路径
+        """
+        sha256 = file_sha256(file_path)
+        object_path = self._object_path(sha256)
+        size = os.path.getsize(file_path)
+
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            tmp_path = f"{object_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            link_or_copy(file_path, tmp_path)
+            os.replace(tmp_path, object_path)
+        link_or_copy(object_path, file_path)
+
+        key = paper_store_key(doi)
+        with self._connect() as conn:
+            total = self._record(conn, sha256, size)
+            if key is not None:
+                conn.execute("INSERT OR REPLACE INTO refs(key, sha256) VALUES(?, ?)", (key, sha256))
+
+        if self.max_bytes and total > self.max_bytes:
+            self.evict(self.max_bytes)
+        return object_path
+
+    def stats(self):
+        """
+        获取仓库统计信息
+
+        Returns:
+            dict: 对象数、总大小、命中/未命中次数、命中率、回收的字节数和节省的字节数
+        """
+        stats = super().stats()
+        stats.setdefault("bytes_saved", 0)
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """
+    获取全局PDF仓库，未启用时返回None
+
+    Returns:
+        PdfStore: 仓库实例
+    """
+    global _store
+    if not settings.PDF_STORE_ENABLED:
+        return None
+    with _store_lock:
+        if _store is None:
+            root = settings.PDF_STORE_PATH or os.path.join(OUTPUT_PATH, "pdf_store")
+            _store = PdfStore(root, max_bytes=settings.PDF_STORE_MAX_BYTES)
+        return _store
+
+
+def main():
+    parser, _ = build_cli("内容寻址PDF仓库", evict_command="gc", evict_help="按大小上限回收对象")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    store = get_pdf_store()
+    if store is None:
+        print("PDF仓库未启用（PDF_STORE_ENABLED=False）")
+        return
+    run_cli(store, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,211 +8,294 @@
 import requests
 import zipfile
 import os
-import pandas as pd
-import time
-from app.core.config import OUTPUT_PATH
+import shutil
+import tempfile
+from app.core.config import settings
+from app.utils.conversion_cache import cached_convert
+from app.utils.local_pdf2md import local_engine_available, pdf2md_local, pdf_page_count
 
+# MinerU API单次请求的超时时间（秒）
+MINERU_TIMEOUT = 60
 
-def download_zip_file(url, save_path):
+# 转换缓存中MinerU结果的版本标识，MinerU输出格式或后处理变化时递增
+MINERU_CONVERTER_VERSION = "mineru-api/1"
+
+# 随Markdown一起解压的图片类型
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg')
+
+
+def extract_pdf_name(pdf_path):
     """
-    下载ZIP文件
+    从PDF路径中提取文件名（不含扩展名）
     
     Args:
-        url (str): ZIP文件的URL
-        save_path (str): 保存路径
+        pdf_path (str): PDF文件路径
     
     Returns:
-        bool: 下载是否成功
+        str: 文件名（不含扩展名）
     """
+    return os.path.splitext(os.path.basename(pdf_path))[0]
+
+
+def mineru_submit(pdf_path, api_url, api_key):
+    """
+    上传PDF并提交MinerU转换任务
+    
+    Args:
+        pdf_path (str): PDF文件路径
+        api_url (str): MinerU API地址
+        api_key (str): MinerU API密钥
+    
+    Returns:
+        str: 转换任务ID，失败返回None
+    """
+    headers = {'Authorization': f'Bearer {api_key}'}
+    
+    # 上传PDF文件
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
+        with open(pdf_path, 'rb') as f:
+            response = requests.post(f"{api_url}/upload", files={'file': f}, headers=headers,
+                                     timeout=MINERU_TIMEOUT)
+            response.raise_for_status()
         
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        file_id = response.json().get('file_id')
+        if not file_id:
+            print("上传失败，未获取到file_id")
+            return None
+    
+    except Exception as e:
+        print(f"上传PDF文件失败: {e}")
+        return None
+    
+    # 开始转换
+    convert_data = {
+        'file_id': file_id,
+        'output_format': 'markdown'
+    }
+    
+    try:
+        response = requests.post(f"{api_url}/convert", json=convert_data, headers=headers, timeout=MINERU_TIMEOUT)
+        response.raise_for_status()
         
-        return True
+        task_id = response.json().get('task_id')
+        if not task_id:
+            print("转换失败，未获取到task_id")
+            return None
+        return task_id
+    
     except Exception as e:
-        print(f"下载ZIP文件失败: {e}")
-        return False
+        print(f"开始转换失败: {e}")
+        return None
 
 
-def find_md_files_in_zip(zip_path):
+def mineru_status(task_id, api_url, api_key):
     """
-    在ZIP文件中查找MD文件
+    查询MinerU转换任务状态
     
     Args:
-        zip_path (str): ZIP文件路径
+        task_id (str): 转换任务ID
+        api_url (str): MinerU API地址
+        api_key (str): MinerU API密钥
     
     Returns:
-        list: MD文件列表
+        dict: 状态信息，包含status以及完成后的download_url
     """
-    md_files = []
-    try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for file_info in zip_ref.infolist():
-                if file_info.filename.endswith('.md'):
-                    md_files.append(file_info.filename)
-    except Exception as e:
-        print(f"读取ZIP文件失败: {e}")
-    
-    return md_files
+    headers = {'Authorization': f'Bearer {api_key}'}
+    response = requests.get(f"{api_url}/status/{task_id}", headers=headers, timeout=MINERU_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
 
 
-def extract_pdf_name(pdf_path):
+def _is_zip_response(url, response):
+    """根据链接后缀或Content-Type判断结果是否为ZIP压缩包"""
+    content_type = response.headers.get('Content-Type', '')
+    return url.split('?', 1)[0].lower().endswith('.zip') or 'zip' in content_type
+
+
+def _safe_member_path(output_path, member_name):
+    """把压缩包成员名映射到输出目录下的路径，拒绝绝对路径和..越界"""
+    target = os.path.normpath(os.path.join(output_path, member_name))
+    if os.path.isabs(member_name) or not target.startswith(os.path.abspath(output_path) + os.sep):
+        return None
+    return target
+
+
+def extract_zip_stream(response, md_file_path, include_images=False, spool_max_bytes=None):
     """
-    从PDF路径中提取文件名（不含扩展名）
+    把ZIP响应读入有界的内存缓冲（超过上限才落到临时文件），只解压Markdown（及可选的图片）成员
+    
+    压缩包中的主Markdown（最大的.md成员）写到md_file_path，图片保持在压缩包内的相对路径下，
+    Markdown中的图片引用无需改写。
     
     Args:
-        pdf_path (str): PDF文件路径
+        response (requests.Response): stream=True 的响应
+        md_file_path (str): Markdown输出路径
+        include_images (bool): 是否同时解压图片
+        spool_max_bytes (int): 内存缓冲上限，默认读取配置ZIP_SPOOL_MAX_BYTES
     
     Returns:
-        str: 文件名（不含扩展名）
+        bool: 是否解压出Markdown
     """
-    return os.path.splitext(os.path.basename(pdf_path))[0]
+    if spool_max_bytes is None:
+        spool_max_bytes = settings.ZIP_SPOOL_MAX_BYTES
+    output_path = os.path.dirname(os.path.abspath(md_file_path))
+    
+    with tempfile.SpooledTemporaryFile(max_size=spool_max_bytes) as buffer:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            buffer.write(chunk)
+        buffer.seek(0)
+        
+        with zipfile.ZipFile(buffer) as zip_ref:
+            members = [info for info in zip_ref.infolist() if not info.is_dir()]
+            md_members = [info for info in members if info.filename.endswith('.md')]
+            if not md_members:
+                print("ZIP文件中没有Markdown文件")
+                return False
+            
+            main_md = max(md_members, key=lambda info: info.file_size)
+            with zip_ref.open(main_md) as src, open(md_file_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            
+            if include_images:
+                for info in members:
+                    if not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    target = _safe_member_path(output_path, info.filename)
+                    if target is None:
+                        continue
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with zip_ref.open(info) as src, open(target, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+    return True
 
 
-def download_file_mineruapi(url, save_path):
+def download_markdown_result(url, md_file_path, include_images=None):
     """
-    通过MinerU API下载文件
+    下载转换结果：ZIP压缩包在内存中解压出Markdown，其余直接写入文件
     
     Args:
-        url (str): 文件URL
-        save_path (str): 保存路径
+        url (str): 结果下载链接
+        md_file_path (str): Markdown输出路径
+        include_images (bool): ZIP中的图片是否一并解压，默认读取配置MINERU_EXTRACT_IMAGES
     
     Returns:
         bool: 下载是否成功
     """
+    if include_images is None:
+        include_images = settings.MINERU_EXTRACT_IMAGES
     try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        
-        print(f"文件下载成功: {save_path}")
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"下载文件时发生网络错误: {e}")
+        with requests.get(url, stream=True, timeout=MINERU_TIMEOUT) as response:
+            response.raise_for_status()
+            if _is_zip_response(url, response):
+                success = extract_zip_stream(response, md_file_path, include_images)
+            else:
+                with open(md_file_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        f.write(chunk)
+                success = True
+        if success:
+            print(f"文件下载成功: {md_file_path}")
+        return success
+    except (requests.exceptions.RequestException, zipfile.BadZipFile) as e:
+        print(f"下载转换结果失败: {e}")
         return False
     except Exception as e:
-        print(f"下载文件时发生未知错误: {e}")
+        print(f"下载转换结果时发生未知错误: {e}")
         return False
 
 
-def pdf2md_mineruapi(pdf_path, output_path):
+def mineru_fetch_result(status_result, pdf_path, output_path):
     """
-    使用MinerU API将PDF转换为Markdown
+    下载已完成的转换结果
     
     Args:
+        status_result (dict): 状态为completed的查询结果
         pdf_path (str): PDF文件路径
         output_path (str): 输出路径
     
     Returns:
         str: 转换后的Markdown文件路径，如果失败返回None
     """
-    # 读取Excel文件
-    excel_path = os.path.join(OUTPUT_PATH, 'mineruapi.xlsx')
-    
-    try:
-        df = pd.read_excel(excel_path)
-    except FileNotFoundError:
-        print(f"Excel文件不存在: {excel_path}")
-        return None
-    except Exception as e:
-        print(f"读取Excel文件失败: {e}")
+    download_url = status_result.get('download_url')
+    if not download_url:
+        print("转换完成但未获取到下载链接")
         return None
     
-    # 获取第一行的API信息
-    if len(df) == 0:
-        print("Excel文件为空")
-        return None
+    # 下载转换后的文件
+    pdf_name = extract_pdf_name(pdf_path)
+    md_file_path = os.path.join(output_path, f"{pdf_name}.md")
     
-    api_url = df.iloc[0]['api_url']
-    api_key = df.iloc[0]['api_key']
+    if download_markdown_result(download_url, md_file_path):
+        return md_file_path
+    return None
+
+
+def pdf2md_mineruapi(pdf_path, output_path):
+    """
+    使用MinerU API将PDF转换为Markdown
     
-    # 上传PDF文件
-    upload_url = f"{api_url}/upload"
+    先按PDF内容查转换缓存，命中时不上传；未命中时把任务交给进程内共享的MineruConversionManager，
+    与其他并发转换共用同一个状态轮询循环。
+    转换缓存只保存Markdown，开启MINERU_EXTRACT_IMAGES时不使用缓存，否则命中后图片缺失。
+
+    Args:
+        pdf_path (str): PDF文件路径
+        output_path (str): 输出路径
     
-    try:
-        with open(pdf_path, 'rb') as f:
-            files = {'file': f}
-            headers = {'Authorization': f'Bearer {api_key}'}
-            
-            response = requests.post(upload_url, files=files, headers=headers)
-            response.raise_for_status()
-            
-            upload_result = response.json()
-            file_id = upload_result.get('file_id')
-            
-            if not file_id:
-                print("上传失败，未获取到file_id")
-                return None
+    Returns:
+        str: 转换后的Markdown文件路径，如果失败返回None
+    """
+    if settings.MINERU_EXTRACT_IMAGES:
+        return _convert_with_mineru_manager(pdf_path, output_path)
+    return cached_convert(pdf_path, output_path, MINERU_CONVERTER_VERSION, _convert_with_mineru_manager)
+
+
+def _convert_with_mineru_manager(pdf_path, output_path):
+    from app.utils.mineru_manager import get_conversion_manager
     
+    manager = get_conversion_manager()
+    # 管理器保证任务在manager.timeout后结束；再留出一次轮询间隔和查询/下载请求的时间，防止调用方无限等待
+    result_timeout = manager.timeout + manager.max_interval + 2 * MINERU_TIMEOUT
+    try:
+        return manager.submit(pdf_path, output_path).result(timeout=result_timeout)
     except Exception as e:
-        print(f"上传PDF文件失败: {e}")
+        print(f"PDF转换失败: {e}")
         return None
+
+
+def pdf2md(pdf_path, output_path, mode=None):
+    """
+    按配置选择转换方式将PDF转换为Markdown
     
-    # 开始转换
-    convert_url = f"{api_url}/convert"
-    convert_data = {
-        'file_id': file_id,
-        'output_format': 'markdown'
-    }
+    mode取值：
+        mineru   只使用MinerU API
+        local    只使用本地引擎
+        fallback 先用MinerU，失败（未配置密钥、服务不可用、超时）时改用本地引擎
+        fast     页数不超过PDF2MD_FAST_PATH_MAX_PAGES的短论文直接用本地引擎，其余同fallback
     
-    try:
-        headers = {'Authorization': f'Bearer {api_key}'}
-        response = requests.post(convert_url, json=convert_data, headers=headers)
-        response.raise_for_status()
-        
-        convert_result = response.json()
-        task_id = convert_result.get('task_id')
-        
-        if not task_id:
-            print("转换失败，未获取到task_id")
-            return None
+    Args:
+        pdf_path (str): PDF文件路径
+        output_path (str): 输出路径
+        mode (str): 转换方式，默认读取配置PDF2MD_MODE
     
-    except Exception as e:
-        print(f"开始转换失败: {e}")
-        return None
+    Returns:
+        str: 转换后的Markdown文件路径，如果失败返回None
+    """
+    mode = mode or settings.PDF2MD_MODE
     
-    # 轮询转换状态
-    status_url = f"{api_url}/status/{task_id}"
+    if mode == 'local':
+        return pdf2md_local(pdf_path, output_path)
     
-    while True:
-        try:
-            headers = {'Authorization': f'Bearer {api_key}'}
-            response = requests.get(status_url, headers=headers)
-            response.raise_for_status()
-            
-            status_result = response.json()
-            status = status_result.get('status')
-            
-            if status == 'completed':
-                download_url = status_result.get('download_url')
-                if download_url:
-                    # 下载转换后的文件
-                    pdf_name = extract_pdf_name(pdf_path)
-                    md_file_path = os.path.join(output_path, f"{pdf_name}.md")
-                    
-                    if download_file_mineruapi(download_url, md_file_path):
-                        return md_file_path
-                    else:
-                        return None
-                else:
-                    print("转换完成但未获取到下载链接")
-                    return None
-            
-            elif status == 'failed':
-                print("转换失败")
-                return None
-            
-            else:
-                print(f"转换中，当前状态: {status}")
-                time.sleep(5)  # 等待5秒后再次查询
-        
-        except Exception as e:
-            print(f"查询转换状态失败: {e}")
-            return None
\ No newline at end of file
+    if mode == 'fast' and local_engine_available():
+        page_count = pdf_page_count(pdf_path)
+        if page_count is not None and page_count <= settings.PDF2MD_FAST_PATH_MAX_PAGES:
+            md_file_path = pdf2md_local(pdf_path, output_path)
+            if md_file_path:
+                return md_file_path
+    
+    md_file_path = pdf2md_mineruapi(pdf_path, output_path)
+    if md_file_path or mode == 'mineru' or not local_engine_available():
+        return md_file_path
+    
+    print(f"MinerU转换失败，改用本地引擎: {pdf_path}")
+    return pdf2md_local(pdf_path, output_path)
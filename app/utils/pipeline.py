@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/17 10:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：分阶段生产者/消费者流水线。
+# 每个阶段有独立的工作线程数和有界输入队列，各阶段同时处理不同的条目；
+# 阶段函数返回None（或抛出异常）时该条目在此阶段结束，结果为None。
+# 运行期间定期输出各阶段的队列深度和忙碌线程数，队列持续积压的阶段即瓶颈。
+
+import logging
+import queue
+import threading
+import time
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 队列中表示上游已结束的标记
+_DONE = object()
+
+
+class Stage:
+    """流水线的一个阶段"""
+
+    def __init__(self, name, func, workers=1, queue_size=0):
+        """
+        Args:
+            name (str): 阶段名称
+            func (callable): func(item) -> 下一阶段的输入，返回None表示该条目到此结束
+            workers (int): 工作线程数
+            queue_size (int): 输入队列容量，0表示workers的两倍
+        """
+        self.name = name
+        self.func = func
+        self.workers = max(workers, 1)
+        self.queue = queue.Queue(maxsize=queue_size or self.workers * 2)
+        self.busy = 0
+        self.processed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+
+class Pipeline:
+    """由多个阶段串联的流水线"""
+
+    def __init__(self, stages, name="pipeline", report_interval=10.0):
+        """
+        Args:
+            stages (list): Stage列表，按处理顺序排列
+            name (str): 流水线名称，用于日志
+            report_interval (float): 输出队列深度的间隔（秒），0表示不输出
+        """
+        self.stages = stages
+        self.name = name
+        self.report_interval = report_interval
+        self._results = {}
+        self._results_lock = threading.Lock()
+
+    def queue_depths(self):
+        """
+        获取各阶段的队列深度和忙碌线程数
+
+        Returns:
+            dict: 阶段名称 -> {"queued", "busy", "workers"}
+        """
+        return {stage.name: {"queued": stage.queue.qsize(), "busy": stage.busy, "workers": stage.workers}
+                for stage in self.stages}
+
+    def report(self):
+        """
+        获取各阶段的累计统计
+
+        Returns:
+            dict: 阶段名称 -> {"processed", "dropped", "busy_seconds", "max_depth"}
+        """
+        return {stage.name: {"processed": stage.processed, "dropped": stage.dropped,
+                             "busy_seconds": round(stage.busy_seconds, 2), "max_depth": stage.max_depth}
+                for stage in self.stages}
+
+    def _worker(self, index):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            entry = stage.queue.get()
+            if entry is _DONE:
+                return
+            position, item = entry
+            with stage._lock:
+                stage.busy += 1
+            start = time.time()
+            try:
+                output = stage.func(item)
+            except Exception as e:
+                logger.error(f"{self.name} 阶段 {stage.name} 处理失败: {e}")
+                output = None
+            with stage._lock:
+                stage.busy -= 1
+                stage.busy_seconds += time.time() - start
+                stage.processed += 1
+                stage.dropped += output is None
+
+            if output is None:
+                continue
+            if next_stage is None:
+                with self._results_lock:
+                    self._results[position] = output
+            else:
+                next_stage.queue.put((position, output))
+                with next_stage._lock:
+                    next_stage.max_depth = max(next_stage.max_depth, next_stage.queue.qsize())
+
+    def _monitor(self, finished):
+        while not finished.wait(self.report_interval):
+            depths = ", ".join(f"{name} {d['queued']}排队/{d['busy']}/{d['workers']}处理中"
+                               for name, d in self.queue_depths().items())
+            print(f"\033[1;32m | INFO     | {self.name} 队列深度: {depths} \033[0m")
+
+    def run(self, items):
+        """
+        让全部条目流经各阶段
+
+        Args:
+            items (iterable): 第一阶段的输入
+
+        Returns:
+            list: 与输入顺序一致的最后一阶段输出，中途结束的条目为None
+        """
+        self._results = {}
+        finished = threading.Event()
+        if self.report_interval:
+            threading.Thread(target=self._monitor, args=(finished,), daemon=True).start()
+
+        # 每个阶段的工作线程全部退出后，再通知下一阶段结束
+        stage_threads = []
+        for index, stage in enumerate(self.stages):
+            threads = [threading.Thread(target=self._worker, args=(index,), daemon=True,
+                                        name=f"{self.name}-{stage.name}-{i}") for i in range(stage.workers)]
+            for thread in threads:
+                thread.start()
+            stage_threads.append(threads)
+
+        start = time.time()
+        count = 0
+        first = self.stages[0]
+        for count, item in enumerate(items, 1):
+            first.queue.put((count - 1, item))
+            first.max_depth = max(first.max_depth, first.queue.qsize())
+
+        for stage, threads in zip(self.stages, stage_threads):
+            for _ in threads:
+                stage.queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        finished.set()
+        elapsed = time.time() - start
+        summary = ", ".join(f"{name} 完成{r['processed']}/失败{r['dropped']}/最大排队{r['max_depth']}/"
+                            f"忙碌{r['busy_seconds']}s" for name, r in self.report().items())
+        print(f"\033[1;32m | INFO     | {self.name} 结束，耗时 {elapsed:.1f}s: {summary} \033[0m")
+        return [self._results.get(position) for position in range(count)]
@@ -5,30 +5,312 @@
 # @QQ:1041264242
 # 注意事项：
 
+import collections
 import json
+import mmap
 import os
 import re
+import shutil
+import threading
+import uuid
 import arxiv
 import requests
 from bs4 import BeautifulSoup
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
 from scihub_cn.scihub import SciHub
-from app.core.config import OUTPUT_PATH, Proxies
+from app.core.config import OUTPUT_PATH, Proxies, settings
+from app.utils.arxiv_api import normalize_arxiv_id, normalize_doi
+from app.utils.pdf_store import get_pdf_store, paper_store_key
+from app.utils.source_health import source_health
+from app.utils.source_stats import source_stats, doi_prefix
 import time
 import logging
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 流式下载的分块大小
+PDF_CHUNK_SIZE = 64 * 1024
+
+# 竞速下载时每个下载线程持有的取消标志
+_race_context = threading.local()
+
+# arXiv ID -> PDF链接，来自检索结果或批量id_list查询，进程内共享；
+# 同时带有期刊DOI的arXiv论文另以"doi:<规范化DOI>"为键记录，按DOI下载时也能直接复用
+_arxiv_pdf_urls = {}
+_arxiv_pdf_urls_lock = threading.Lock()
+
+# 当前线程正在尝试的下载源是否出现了自身故障（网络错误、限流、验证码等）
+_source_context = threading.local()
+
+# 视为下载源故障的HTTP状态码（另加全部5xx）
+SOURCE_ERROR_STATUS = (403, 429)
+
+
+class FairSemaphore:
+    """
+    先进先出的计数信号量
+    
+    许可在释放时直接移交给等待最久的线程，后到的线程不能插队。
+    """
+    
+    def __init__(self, value):
+        self._value = value
+        self._lock = threading.Lock()
+        self._waiters = collections.deque()
+    
+    def acquire(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return True
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+        return True
+    
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().set()
+            else:
+                self._value += 1
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class HostLimiter:
+    """
+    按主机限制并发连接数
+    
+    主机名按后缀匹配最具体的配置项（如 export.arxiv.org 匹配 arxiv.org），
+    未配置的主机使用默认上限。
+    """
+    
+    def __init__(self, limits, default_limit=4):
+        self.limits = dict(limits)
+        self.default_limit = default_limit
+        self._semaphores = {}
+        self._lock = threading.Lock()
+    
+    def _host_key(self, host):
+        host = (host or "").lower()
+        matches = [key for key in self.limits if host == key or host.endswith("." + key)]
+        return max(matches, key=len) if matches else host
+    
+    def semaphore(self, url):
+        """
+        获取URL所属主机的信号量
+        
+        Args:
+            url (str): 请求URL或主机名
+        
+        Returns:
+            FairSemaphore: 主机信号量
+        """
+        host = urllib.parse.urlparse(url).hostname if "://" in url else url
+        key = self._host_key(host)
+        with self._lock:
+            semaphore = self._semaphores.get(key)
+            if semaphore is None:
+                limit = self.limits.get(key, self.default_limit)
+                semaphore = self._semaphores[key] = FairSemaphore(limit)
+            return semaphore
+
+
+host_limiter = HostLimiter(settings.PDF_HOST_LIMITS, default_limit=settings.PDF_HOST_DEFAULT_LIMIT)
+
+
+def http_get(url, **kwargs):
+    """
+    受主机并发上限约束的requests.get
+    
+    Args:
+        url (str): 请求URL
+        **kwargs: 透传给requests.get的参数
+    
+    Returns:
+        requests.Response: 响应对象
+    """
+    kwargs.setdefault('timeout', tuple(settings.PDF_DOWNLOAD_TIMEOUT))
+    with host_limiter.semaphore(url):
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            mark_source_error()
+            raise
+    if response.status_code in SOURCE_ERROR_STATUS or response.status_code >= 500:
+        mark_source_error()
+    return response
+
+
+def mark_source_error():
+    """标记当前线程正在尝试的下载源出现故障，供熔断器统计"""
+    _source_context.error = True
+
+
+def is_download_cancelled():
+    """
+    判断当前线程所在的竞速下载是否已有其他下载源胜出
+    
+    Returns:
+        bool: 已取消返回True
+    """
+    cancel_event = getattr(_race_context, 'cancel_event', None)
+    return cancel_event is not None and cancel_event.is_set()
+
 
 ### 下载PDF的保存路径
 
-def check_pdf(file_path):
+# 结构校验时在文件末尾查找 %%EOF 和 startxref 的范围
+PDF_TRAILER_WINDOW = 2048
+
+# startxref偏移量允许的误差（部分生成器写出的偏移量略有偏差，阅读器会在附近查找交叉引用表）
+PDF_STARTXREF_SLACK = 1024
+# 查找页面树/Count时读取单个对象的最大范围
+PDF_OBJECT_WINDOW = 4096
+
+_STARTXREF_PATTERN = re.compile(rb'startxref\s+(\d+)')
+_XREF_TARGET_PATTERN = re.compile(rb'\s*(?:xref\b|\d+\s+\d+\s+obj\b)')
+_XREF_NEARBY_PATTERN = re.compile(rb'xref\b|(?<!\d)\d+\s+\d+\s+obj\b')
+_XREF_SUBSECTION_PATTERN = re.compile(rb'\s*(\d+)\s+(\d+)[ \t]*\r?\n')
+_XREF_ENTRY_PATTERN = re.compile(rb'(\d{10}) (\d{5}) ([nf])')
+_ROOT_PATTERN = re.compile(rb'/Root\s+(\d+)\s+\d+\s+R')
+_PAGES_PATTERN = re.compile(rb'/Pages\s+(\d+)\s+\d+\s+R')
+
+
+def _locate_xref(mm, offset, limit):
+    """
+    在startxref偏移量附近（±PDF_STARTXREF_SLACK）查找交叉引用表或交叉引用流对象
+
+    返回:
+    int: 实际位置，找不到返回None。
+    """
+    if _XREF_TARGET_PATTERN.match(mm[offset:offset + 64]):
+        return offset
+    start = max(0, offset - PDF_STARTXREF_SLACK)
+    window = mm[start:min(limit, offset + PDF_STARTXREF_SLACK)]
+    candidates = [start + match.start() for match in _XREF_NEARBY_PATTERN.finditer(window)]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda position: abs(position - offset))
+
+
+def _xref_object_offset(mm, xref_offset, object_number):
+    """
+    在传统xref表中查找对象的偏移量，只读取所需的子段表头和一条记录
+
+    返回:
+    int: 对象偏移量，未收录或格式不规范时返回None。
+    """
+    pos = xref_offset + mm[xref_offset:xref_offset + 64].index(b'xref') + 4
+    while True:
+        header = _XREF_SUBSECTION_PATTERN.match(mm[pos:pos + 64])
+        if not header:
+            return None
+        first, count = int(header.group(1)), int(header.group(2))
+        entries = pos + header.end()
+        if first <= object_number < first + count:
+            # 每条记录固定20字节：10位偏移量、5位代号、n/f和两字节换行
+            entry_offset = entries + (object_number - first) * 20
+            entry = _XREF_ENTRY_PATTERN.match(mm[entry_offset:entry_offset + 20])
+            if not entry or entry.group(3) != b'n':
+                return None
+            return int(entry.group(1))
+        pos = entries + count * 20
+
+
+def _object_body(mm, offset):
+    """读取对象内容（至endobj，最多PDF_OBJECT_WINDOW字节）"""
+    body = mm[offset:offset + PDF_OBJECT_WINDOW]
+    end = body.find(b'endobj')
+    return body if end == -1 else body[:end]
+
+
+def _page_tree_has_count(mm, xref_offset, trailer):
+    """
+    经trailer的/Root找到目录对象，再经/Pages找到页面树根对象，检查其中的/Count
+
+    只读取这几个对象附近的内容，不扫描整个文件。
+
+    返回:
+    bool: 页面树根缺少/Count时返回False；存在，或无法经xref表定位（如增量更新未收录这些对象）时返回True。
+    """
+    root = _ROOT_PATTERN.search(trailer)
+    catalog_offset = root and _xref_object_offset(mm, xref_offset, int(root.group(1)))
+    if not catalog_offset:
+        return True
+    pages = _PAGES_PATTERN.search(_object_body(mm, catalog_offset))
+    pages_offset = pages and _xref_object_offset(mm, xref_offset, int(pages.group(1)))
+    if not pages_offset:
+        return True
+    return b'/Count' in _object_body(mm, pages_offset)
+
+
+def check_pdf_structure(file_path):
+    """
+    以内存映射方式快速校验PDF结构，不做完整解析。
+    
+    依次检查：%PDF- 文件头、末尾的 %%EOF、startxref 偏移量附近（±PDF_STARTXREF_SLACK）
+    是否有 xref 表或交叉引用流对象（偏移量有偏差时只记录警告）、页面树的 /Count 是否存在
+    （经 trailer 的 /Root 和 xref 表定位页面树根对象；使用交叉引用流的文件页面树可能被压缩进对象流，不做此项检查）。
+    
+    参数:
+    file_path (str): PDF文件路径。
+    
+    返回:
+    str: 校验失败的原因，通过时返回None。
+    """
+    size = os.path.getsize(file_path)
+    if size < 5:
+        return "文件过小"
+    
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:5] != b'%PDF-':
+            return "缺少%PDF-文件头"
+        
+        tail_start = max(0, size - PDF_TRAILER_WINDOW)
+        eof = mm.rfind(b'%%EOF', tail_start)
+        if eof == -1:
+            return "末尾缺少%%EOF，文件可能被截断"
+        
+        startxref = mm.rfind(b'startxref', tail_start, eof)
+        if startxref == -1:
+            return "缺少startxref"
+        match = _STARTXREF_PATTERN.match(mm[startxref:eof])
+        if not match:
+            return "startxref偏移量无效"
+        offset = int(match.group(1))
+        if not 0 < offset < startxref + PDF_STARTXREF_SLACK:
+            return f"startxref偏移量{offset}越界"
+        xref_offset = _locate_xref(mm, offset, startxref)
+        if xref_offset is None:
+            return f"startxref偏移量{offset}附近未找到交叉引用表"
+        if xref_offset != offset:
+            logger.warning(f"startxref偏移量{offset}与交叉引用表的实际位置{xref_offset}不一致: {file_path}")
+        
+        # 交叉引用流（PDF 1.5+）通常伴随对象流，页面树可能被压缩，只对传统xref表检查/Count
+        if mm[xref_offset:xref_offset + 64].lstrip().startswith(b'xref'):
+            trailer = mm[tail_start:startxref]
+            if not _page_tree_has_count(mm, xref_offset, trailer[trailer.rfind(b'trailer'):]):
+                return "页面树缺少/Count"
+    
+    return None
+
+
+def check_pdf(file_path, structural=False):
     """
     检查PDF文件是否能正常打开。
 
     参数:
     file_path (str): PDF文件路径。
+    structural (bool): 是否额外做结构校验（见check_pdf_structure），用于尽早发现截断或损坏的下载。
 
     返回:
     bool: 如果文件能正常打开则返回True，否则返回False。
@@ -44,6 +326,13 @@ def check_pdf(file_path):
         return False
     
     try:
+        if structural:
+            reason = check_pdf_structure(file_path)
+            if reason:
+                logger.warning(f"PDF structure check failed ({reason}): {file_path}")
+                return False
+            return True
+        
         with open(file_path, 'rb') as f:
             # 读取文件的前5个字节，PDF文件通常以"%PDF-"开头
             # 这里我们读取5个字节是因为"%PDF-"是5个字节（包括百分号）
@@ -96,7 +385,7 @@ def search_google_scholar(doi):
                       "Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    response = requests.get(search_url, headers=headers, proxies=Proxies)
+    response = http_get(search_url, headers=headers, proxies=Proxies)
 
     soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -112,6 +401,119 @@ def search_google_scholar(doi):
         return pdf_link
 
 
+def _build_session():
+    """
+    创建带连接池的requests会话，供所有PDF流式下载复用
+    
+    Returns:
+        requests.Session: 会话对象
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=32)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                                     "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+    return session
+
+
+_download_session = _build_session()
+
+
+def stream_pdf_download(pdf_url, save_path, timeout=None, max_retries=None, chunk_size=PDF_CHUNK_SIZE):
+    """
+    流式下载PDF文件
+    
+    分块写入 save_path + ".part"，首块不以 %PDF- 开头（如HTML登录页、验证码页）时立即放弃；
+    网络中断时保留已下载部分，重试时以HTTP Range续传；全部写完后原子重命名为目标文件。
+    内存占用与PDF大小和并发数无关。
+    
+    Args:
+        pdf_url (str): PDF文件URL
+        save_path (str): 保存路径
+        timeout (tuple): (连接超时, 读取超时)秒，默认读取配置PDF_DOWNLOAD_TIMEOUT
+        max_retries (int): 网络错误时的重试次数，默认读取配置PDF_DOWNLOAD_RETRIES
+        chunk_size (int): 分块大小
+    
+    Returns:
+        str: 下载的文件路径，如果失败返回None
+    """
+    if timeout is None:
+        timeout = tuple(settings.PDF_DOWNLOAD_TIMEOUT)
+    if max_retries is None:
+        max_retries = settings.PDF_DOWNLOAD_RETRIES
+    
+    part_path = f"{save_path}.part"
+    # 续传时用于确认服务器上的文件没有变化
+    validator = None
+    
+    for attempt in range(max_retries + 1):
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if resume_from and validator:
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = validator
+        
+        try:
+            with host_limiter.semaphore(pdf_url):
+                with _download_session.get(pdf_url, stream=True, timeout=timeout, proxies=Proxies,
+                                           headers=headers) as response:
+                    if response.status_code == 206 and "Range" in headers:
+                        mode = 'ab'
+                        logger.info(f"从第{resume_from}字节续传PDF: {pdf_url}")
+                    else:
+                        response.raise_for_status()
+                        mode = 'wb'
+                    validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                    
+                    header = b'' if mode == 'wb' else None
+                    with open(part_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            # 竞速中已有其他下载源胜出
+                            if is_download_cancelled():
+                                f.close()
+                                os.remove(part_path)
+                                return None
+                            if header is not None:
+                                header += chunk
+                                if len(header) < 5:
+                                    continue
+                                if not header.startswith(b'%PDF-'):
+                                    logger.warning(f"响应不是PDF（Content-Type: "
+                                                   f"{response.headers.get('Content-Type')}），放弃下载: {pdf_url}")
+                                    f.close()
+                                    os.remove(part_path)
+                                    return None
+                                chunk, header = header, None
+                            f.write(chunk)
+                    
+                    if header is not None:
+                        # 响应体不足5字节
+                        os.remove(part_path)
+                        return None
+            
+            os.replace(part_path, save_path)
+            return save_path
+        
+        except requests.exceptions.RequestException as e:
+            status = getattr(e.response, 'status_code', None)
+            if status is None or status in SOURCE_ERROR_STATUS or status >= 500:
+                mark_source_error()
+            if status is not None and status < 500 and status != 429:
+                logger.error(f"下载PDF失败（HTTP {status}）: {pdf_url}")
+                break
+            if attempt < max_retries:
+                wait_time = 2 ** attempt
+                logger.warning(f"下载PDF中断 (尝试 {attempt + 1}/{max_retries + 1}): {e}，{wait_time} 秒后续传...")
+                time.sleep(wait_time)
+            else:
+                logger.error(f"下载PDF失败，已尝试 {max_retries + 1} 次: {e}")
+    
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    return None
+
+
 def download_pdf_from_google(pdf_url, title, output_path):
     """
     从Google Scholar下载PDF文件
@@ -126,15 +528,8 @@ def download_pdf_from_google(pdf_url, title, output_path):
     """
     save_path = os.path.join(output_path, f"{title}.pdf")
 
-    # 发送HTTP GET请求来获取PDF文件
     try:
-        response = requests.get(pdf_url, proxies=Proxies)
-        response.raise_for_status()
-        
-        with open(save_path, 'wb') as f:
-            f.write(response.content)
-        
-        return save_path
+        return stream_pdf_download(pdf_url, save_path)
     except Exception as e:
         logger.error(f"从Google下载PDF失败: {e}")
         return None
@@ -153,9 +548,11 @@ def download_pdf_from_scihub(doi, output_path):
     """
     try:
         sh = SciHub()
-        result = sh.download(doi, path=output_path)
+        with host_limiter.semaphore("sci-hub"):
+            result = sh.download(doi, path=output_path)
         return result
     except Exception as e:
+        mark_source_error()
         logger.error(f"从Sci-Hub下载PDF失败: {e}")
         return None
 
@@ -176,7 +573,7 @@ def download_pdf_from_unpaywall(doi, title, output_path, email="z1041264242@gmai
     url = f"https://api.unpaywall.org/v2/{doi}?email={email}"
     
     try:
-        response = requests.get(url, proxies=Proxies)
+        response = http_get(url, proxies=Proxies)
         response.raise_for_status()
         
         data = response.json()
@@ -192,10 +589,85 @@ def download_pdf_from_unpaywall(doi, title, output_path, email="z1041264242@gmai
         return None
 
 
+def arxiv_id_of(doi):
+    """
+    从arXiv DOI（10.48550/arXiv.xxx）、arXiv链接或裸arXiv ID中提取arXiv ID
+    
+    Args:
+        doi (str): DOI或arXiv ID
+    
+    Returns:
+        str: arXiv ID，出版社DOI返回None
+    """
+    if not doi or (doi.startswith('10.') and 'arxiv' not in doi.lower()):
+        return None
+    return normalize_arxiv_id(doi)
+
+
+def remember_arxiv_pdf_urls(papers):
+    """
+    记录检索结果中已有的arXiv PDF链接，之后下载时无需再查询arXiv API
+    
+    Args:
+        papers (list): get_papers返回的论文信息字典列表
+    """
+    with _arxiv_pdf_urls_lock:
+        for paper in papers:
+            arxiv_id = normalize_arxiv_id(paper.get('id')) or normalize_arxiv_id(paper.get('pdf'))
+            if not arxiv_id or not paper.get('pdf'):
+                continue
+            _arxiv_pdf_urls[arxiv_id] = paper['pdf']
+            doi = normalize_doi(paper.get('doi'))
+            if doi and not arxiv_id_of(doi):
+                _arxiv_pdf_urls[f"doi:{doi}"] = paper['pdf']
+
+
+def prefetch_arxiv_pdf_urls(arxiv_ids, batch_size=None):
+    """
+    以批量id_list查询解析尚未知道PDF链接的arXiv ID
+    
+    Args:
+        arxiv_ids (list): arXiv ID列表
+        batch_size (int): 每次查询的ID数量，默认读取配置ARXIV_ID_BATCH_SIZE
+    
+    Returns:
+        dict: arXiv ID -> PDF链接（只包含本次请求涉及的ID）
+    """
+    if batch_size is None:
+        batch_size = settings.ARXIV_ID_BATCH_SIZE
+    
+    with _arxiv_pdf_urls_lock:
+        missing = list(dict.fromkeys(i for i in arxiv_ids if i and i not in _arxiv_pdf_urls))
+    
+    if missing:
+        client = arxiv.Client(page_size=batch_size, num_retries=3)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            try:
+                with host_limiter.semaphore("https://export.arxiv.org"):
+                    results = list(client.results(arxiv.Search(id_list=batch, max_results=len(batch))))
+            except Exception as e:
+                mark_source_error()
+                logger.error(f"批量查询arXiv ID失败: {e}")
+                continue
+            with _arxiv_pdf_urls_lock:
+                for result in results:
+                    arxiv_id = normalize_arxiv_id(result.entry_id)
+                    if arxiv_id and result.pdf_url:
+                        _arxiv_pdf_urls[arxiv_id] = result.pdf_url
+            logger.info(f"批量解析arXiv ID: 请求 {len(batch)} 个，得到 {len(results)} 个PDF链接")
+    
+    with _arxiv_pdf_urls_lock:
+        return {i: _arxiv_pdf_urls[i] for i in arxiv_ids if i in _arxiv_pdf_urls}
+
+
 def download_pdf_from_arxiv(doi, title, output_path):
     """
     从arXiv下载PDF文件
     
+    优先使用检索阶段已知或批量预取的PDF链接直接下载（期刊DOI也会查找检索阶段记录的链接），
+    都没有时才按标题查询一次arXiv API。
+    
     Args:
         doi (str): 文献的DOI或arXiv ID
         title (str): 文献标题
@@ -205,30 +677,37 @@ def download_pdf_from_arxiv(doi, title, output_path):
         str: 下载的文件路径，如果失败返回None
     """
     try:
-        # 如果DOI包含arxiv，提取arXiv ID
-        if 'arxiv' in doi.lower():
-            arxiv_id = doi.split('/')[-1]
+        arxiv_id = arxiv_id_of(doi)
+        
+        if arxiv_id:
+            pdf_url = prefetch_arxiv_pdf_urls([arxiv_id]).get(arxiv_id)
         else:
-            # 尝试通过标题搜索arXiv
+            with _arxiv_pdf_urls_lock:
+                pdf_url = _arxiv_pdf_urls.get(f"doi:{normalize_doi(doi)}")
+        
+        if not arxiv_id and not pdf_url:
+            # 尝试通过标题搜索arXiv，检索结果中已带有PDF链接
             search = arxiv.Search(
                 query=title,
                 max_results=1,
                 sort_by=arxiv.SortCriterion.Relevance
             )
             
-            results = list(search.results())
+            with host_limiter.semaphore("https://export.arxiv.org"):
+                results = list(search.results())
             if not results:
                 return None
             
-            arxiv_id = results[0].entry_id.split('/')[-1]
+            pdf_url = results[0].pdf_url
+        
+        if not pdf_url:
+            return None
         
         # 下载PDF
-        paper = next(arxiv.Search(id_list=[arxiv_id]).results())
         save_path = os.path.join(output_path, f"{title}.pdf")
-        paper.download_pdf(dirpath=output_path, filename=f"{title}.pdf")
-        
-        return save_path
+        return stream_pdf_download(pdf_url, save_path)
     except Exception as e:
+        mark_source_error()
         logger.error(f"从arXiv下载PDF失败: {e}")
         return None
 
@@ -248,7 +727,7 @@ def download_pdf_from_crossref(doi, title, output_path):
     url = f"https://api.crossref.org/works/{doi}"
     
     try:
-        response = requests.get(url, proxies=Proxies)
+        response = http_get(url, proxies=Proxies)
         response.raise_for_status()
         
         data = response.json()
@@ -316,7 +795,7 @@ def download_pdf_from_Giiisp(doi, title, output_path):
         search_url = api_config['base_url'] + api_config['endpoints']['search']
         search_params = {'doi': doi}
         
-        response = requests.get(search_url, params=search_params, headers=headers, proxies=Proxies)
+        response = http_get(search_url, params=search_params, headers=headers, proxies=Proxies)
         response.raise_for_status()
         
         search_data = response.json()
@@ -331,7 +810,119 @@ def download_pdf_from_Giiisp(doi, title, output_path):
         return None
 
 
-def download_pdf(doi, title, output_path):
+def _attempt_source(method_name, method_func, paper_key, output_path):
+    """
+    在熔断器和负缓存的约束下尝试一个下载源，并记录结果
+    
+    Args:
+        method_name (str): 下载源名称
+        method_func (callable): 下载函数，接收输出目录
+        paper_key (str): 论文键
+        output_path (str): 输出路径
+    
+    Returns:
+        str: 通过校验的PDF路径，失败或被跳过返回None
+    """
+    if not source_health.acquire(paper_key, method_name):
+        logger.info(f"跳过下载源{method_name}（熔断中或近期对该论文失败过）")
+        return None
+    
+    _source_context.error = False
+    result = None
+    start_time = time.time()
+    try:
+        result = method_func(output_path)
+        valid = result and os.path.exists(result) and check_pdf(result, structural=settings.PDF_STRUCTURAL_CHECK)
+        if not valid:
+            result = None
+    except Exception as e:
+        mark_source_error()
+        logger.error(f"从{method_name}下载失败: {e}")
+        result = None
+    finally:
+        if result is None and is_download_cancelled():
+            # 被竞速取消的尝试不计入健康统计
+            source_health.breaker(method_name).release_probe()
+        else:
+            source_health.record(paper_key, method_name, result is not None,
+                                 source_error=getattr(_source_context, 'error', False))
+            source_stats.record(method_name, doi_prefix(paper_key), result is not None, time.time() - start_time)
+        _source_context.error = False
+    return result
+
+
+def _race_download(download_methods, doi, clean_title, output_path):
+    """
+    并发启动多个下载源，采用第一个通过check_pdf校验的结果
+    
+    每个下载源写入独立的临时目录，胜出者的文件移动到最终位置，
+    其余下载源被取消，临时目录在它们全部退出后清理。
+    
+    Args:
+        download_methods (list): [(下载源名称, 下载函数)]，下载函数接收输出目录
+        doi (str): 文献的DOI
+        clean_title (str): 清理后的标题
+        output_path (str): 输出路径
+    
+    Returns:
+        str: 下载的文件路径，如果全部失败返回None
+    """
+    paper_key = paper_store_key(doi) or doi
+    race_dir = os.path.join(output_path, f".race_{uuid.uuid4().hex[:8]}")
+    cancel_event = threading.Event()
+    start_time = time.time()
+    
+    def run(method_name, method_func):
+        _race_context.cancel_event = cancel_event
+        try:
+            if cancel_event.is_set():
+                return None
+            source_dir = os.path.join(race_dir, sanitize_folder_name(method_name))
+            os.makedirs(source_dir, exist_ok=True)
+            logger.info(f"竞速下载: 尝试从{method_name}下载PDF...")
+            return _attempt_source(method_name, method_func, paper_key, source_dir)
+        finally:
+            _race_context.cancel_event = None
+    
+    executor = ThreadPoolExecutor(max_workers=len(download_methods), thread_name_prefix="pdf-race")
+    futures = {executor.submit(run, method_name, method_func): method_name
+               for method_name, method_func in download_methods}
+    
+    winner = None
+    try:
+        for future in as_completed(futures):
+            method_name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"从{method_name}下载失败: {e}")
+                continue
+            if result:
+                save_path = os.path.join(output_path, f"{clean_title}.pdf")
+                os.replace(result, save_path)
+                winner = save_path
+                logger.info(f"竞速下载胜出: {method_name}，首个有效PDF耗时 {time.time() - start_time:.2f} 秒，"
+                            f"DOI: {doi}")
+                break
+    finally:
+        cancel_event.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        
+        # 等落败的下载源全部退出后再删除它们的部分文件
+        def cleanup():
+            wait(futures)
+            shutil.rmtree(race_dir, ignore_errors=True)
+        
+        threading.Thread(target=cleanup, daemon=True).start()
+    
+    if winner is None:
+        logger.info(f"竞速下载的{len(download_methods)}个下载源均失败，耗时 {time.time() - start_time:.2f} 秒")
+    return winner
+
+
+def download_pdf(doi, title, output_path, race=None):
     """
     尝试从多个源下载PDF文件
     
@@ -339,6 +930,8 @@ def download_pdf(doi, title, output_path):
         doi (str): 文献的DOI
         title (str): 文献标题
         output_path (str): 输出路径
+        race (int): 竞速模式下同时启动的下载源数量，默认读取配置PDF_DOWNLOAD_RACE，
+            小于2时按顺序逐个尝试
     
     Returns:
         str: 下载的文件路径，如果失败返回None
@@ -346,44 +939,95 @@ def download_pdf(doi, title, output_path):
     # 清理标题，用作文件名
     clean_title = sanitize_folder_name(title)
     
-    # 尝试多个下载源
+    # 先查全局PDF仓库，命中时直接链接到主题目录
+    store = get_pdf_store()
+    if store is not None:
+        result = store.materialize(doi, os.path.join(output_path, f"{clean_title}.pdf"))
+        if result:
+            logger.info(f"PDF仓库命中: {result} (DOI: {doi})")
+            return result
+    
+    result = _download_pdf_from_sources(doi, clean_title, output_path, race)
+    if result and store is not None:
+        try:
+            store.put(doi, result)
+        except Exception as e:
+            logger.error(f"写入PDF仓库失败: {e}")
+    return result
+
+
+def _download_pdf_from_sources(doi, clean_title, output_path, race=None):
+    """
+    依次（或竞速）尝试各个下载源
+    
+    Args:
+        doi (str): 文献的DOI
+        clean_title (str): 清理后的标题
+        output_path (str): 输出路径
+        race (int): 竞速模式下同时启动的下载源数量
+    
+    Returns:
+        str: 下载的文件路径，如果失败返回None
+    """
+    if race is None:
+        race = settings.PDF_DOWNLOAD_RACE
+    
+    # 尝试多个下载源，下载函数接收输出目录
     download_methods = [
-        ('Unpaywall', lambda: download_pdf_from_unpaywall(doi, clean_title, output_path)),
-        ('arXiv', lambda: download_pdf_from_arxiv(doi, clean_title, output_path)),
-        ('Google Scholar', lambda: getdown_pdf_google_url(doi, clean_title, output_path)),
-        ('Sci-Hub', lambda: download_pdf_from_scihub(doi, output_path)),
-        ('CrossRef', lambda: download_pdf_from_crossref(doi, clean_title, output_path)),
-        ('Giiisp', lambda: download_pdf_from_Giiisp(doi, clean_title, output_path))
+        ('Unpaywall', lambda path: download_pdf_from_unpaywall(doi, clean_title, path)),
+        ('arXiv', lambda path: download_pdf_from_arxiv(doi, clean_title, path)),
+        ('Google Scholar', lambda path: getdown_pdf_google_url(doi, clean_title, path)),
+        ('Sci-Hub', lambda path: download_pdf_from_scihub(doi, path)),
+        ('CrossRef', lambda path: download_pdf_from_crossref(doi, clean_title, path)),
+        ('Giiisp', lambda path: download_pdf_from_Giiisp(doi, clean_title, path))
     ]
     
+    # 没有DOI的arXiv论文以arXiv ID标识，其余下载源都需要DOI，只尝试arXiv
+    if not doi.startswith('10.') and arxiv_id_of(doi):
+        download_methods = [(method_name, method_func) for method_name, method_func in download_methods
+                            if method_name == 'arXiv']
+    
+    # 按该DOI前缀上的期望成功耗时排序，并跳过熔断中或近期对该论文失败过的下载源
+    paper_key = paper_store_key(doi) or doi
+    download_methods = source_stats.order(download_methods, doi_prefix(paper_key))
+    download_methods = [(method_name, method_func) for method_name, method_func in download_methods
+                        if source_health.available(paper_key, method_name)]
+    
+    if race > 1 and len(download_methods) > 1:
+        result = _race_download(download_methods[:race], doi, clean_title, output_path)
+        if result:
+            return result
+        download_methods = download_methods[race:]
+    
     for method_name, method_func in download_methods:
-        try:
-            logger.info(f"尝试从{method_name}下载PDF...")
-            result = method_func()
-            if result and os.path.exists(result) and check_pdf(result):
-                logger.info(f"成功从{method_name}下载PDF: {result}")
-                return result
-        except Exception as e:
-            logger.error(f"从{method_name}下载失败: {e}")
-            continue
+        logger.info(f"尝试从{method_name}下载PDF...")
+        result = _attempt_source(method_name, method_func, paper_key, output_path)
+        if result:
+            logger.info(f"成功从{method_name}下载PDF: {result}")
+            return result
     
     logger.warning(f"所有下载方法都失败了，DOI: {doi}")
     return None
 
 
-def download_all_pdfs(dois, title, topic, user_id, task):
+def download_all_pdfs(dois, title, topic, user_id, task, max_workers=None, papers=None):
     """
     批量下载PDF文件
     
+    使用有界线程池并发下载，任务按输入顺序入队（先进先出），
+    各下载源的请求同时受host_limiter的主机并发上限约束。
+    
     Args:
         dois (list): DOI列表
         title (list): 标题列表
         topic (str): 主题
         user_id (str): 用户ID
         task: 任务对象
+        max_workers (int): 全局并发下载数，默认读取配置PDF_DOWNLOAD_WORKERS
+        papers (list): 检索阶段得到的论文信息字典，其中的arXiv PDF链接会被直接复用
     
     Returns:
-        list: 下载成功的文件路径列表
+        list: 下载成功的文件路径列表，与输入顺序一致
     """
     if isinstance(dois, str):
         dois = [dois]
@@ -394,25 +1038,60 @@ def download_all_pdfs(dois, title, topic, user_id, task):
     topic_path = os.path.join(OUTPUT_PATH, sanitize_folder_name(topic))
     os.makedirs(topic_path, exist_ok=True)
     
-    downloaded_files = []
+    if not dois:
+        return []
+    
+    # 复用检索结果中的PDF链接，其余arXiv ID一次性批量解析
+    if papers:
+        remember_arxiv_pdf_urls(papers)
+    arxiv_ids = [arxiv_id for arxiv_id in map(arxiv_id_of, dois) if arxiv_id]
+    if arxiv_ids:
+        prefetch_arxiv_pdf_urls(arxiv_ids)
     
-    for i, doi in enumerate(dois):
+    def download_one(i, doi):
+        paper_title = title[i] if i < len(title) else f"paper_{i+1}"
         try:
-            paper_title = title[i] if i < len(title) else f"paper_{i+1}"
             logger.info(f"开始下载第{i+1}篇文献: {paper_title}")
-            
             result = download_pdf(doi, paper_title, topic_path)
             if result:
-                downloaded_files.append(result)
                 logger.info(f"下载成功: {result}")
             else:
                 logger.warning(f"下载失败: {paper_title} (DOI: {doi})")
-        
+            return result
         except Exception as e:
             logger.error(f"下载过程中发生错误: {e}")
-            continue
+            return None
+    
+    if max_workers is None:
+        max_workers = settings.PDF_DOWNLOAD_WORKERS
+    max_workers = max(1, min(max_workers, len(dois)))
+    
+    start_time = time.time()
+    results = [None] * len(dois)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-download") as executor:
+        futures = {executor.submit(download_one, i, doi): i for i, doi in enumerate(dois)}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    elapsed = max(time.time() - start_time, 1e-6)
+    
+    downloaded_files = [result for result in results if result]
+    total_bytes = sum(os.path.getsize(path) for path in downloaded_files if os.path.exists(path))
+    
+    logger.info(f"批量下载完成，成功下载{len(downloaded_files)}/{len(dois)}个文件，耗时 {elapsed:.1f} 秒，"
+                f"吞吐 {len(downloaded_files) / elapsed * 60:.1f} PDF/分钟，"
+                f"{total_bytes / 1024 / 1024 / elapsed:.2f} MB/秒（并发 {max_workers}）")
+    
+    health = source_health.report()
+    open_sources = [name for name, info in health["sources"].items() if info["state"] != "closed"]
+    if open_sources or health["skipped"]:
+        logger.info(f"下载源健康状况: 熔断中 {open_sources}，累计跳过 {health['skipped']} 次，"
+                    f"负缓存 {health['negative_cache_size']} 条")
     
-    logger.info(f"批量下载完成，成功下载{len(downloaded_files)}个文件")
+    store = get_pdf_store()
+    if store is not None:
+        stats = store.stats()
+        logger.info(f"PDF仓库累计命中率 {stats['hit_rate']:.1%}（命中 {stats['hits']}，未命中 {stats['misses']}），"
+                    f"节省下载 {stats['bytes_saved'] / 1024 / 1024:.1f} MB")
     return downloaded_files
 
 
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/8 16:30
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：PDF下载源健康跟踪。
+# 每个下载源一个熔断器（连续失败N次后熔断，冷却后放行一次探测请求），
+# 另有(论文, 下载源)负缓存，近期失败过的组合直接跳过。进程内所有并发任务共享。
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """单个下载源的熔断器"""
+
+    def __init__(self, name, failure_threshold=5, cooldown=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def available(self):
+        """
+        判断下载源当前是否可能放行请求（不改变状态）
+
+        Returns:
+            bool: 可能放行返回True
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return time.time() - self.opened_at >= self.cooldown
+            return not self.probe_in_flight
+
+    def allow(self):
+        """
+        申请发起一次请求；熔断冷却结束后只放行一个探测请求
+
+        Returns:
+            bool: 放行返回True
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                logger.info(f"下载源 {self.name} 熔断冷却结束，放行探测请求")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"下载源 {self.name} 恢复正常，关闭熔断")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"下载源 {self.name} 连续失败 {self.consecutive_failures} 次，"
+                                   f"熔断 {self.cooldown} 秒")
+                self.state = OPEN
+                self.opened_at = time.time()
+            self.probe_in_flight = False
+
+    def release_probe(self):
+        """探测请求既未成功也未出错（如该论文在此源不存在）时归还探测名额"""
+        with self._lock:
+            self.probe_in_flight = False
+
+
+class NegativeCache:
+    """带过期时间和容量上限的(论文, 下载源)失败缓存"""
+
+    def __init__(self, ttl=6 * 3600, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._entries[key] = time.time() + self.ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at < time.time():
+                del self._entries[key]
+                return False
+            return True
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SourceHealth:
+    """所有下载源的熔断器和负缓存"""
+
+    def __init__(self, failure_threshold=5, cooldown=300, negative_ttl=6 * 3600, negative_size=10000):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.negative_cache = NegativeCache(negative_ttl, negative_size)
+        self.skipped = 0
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, source):
+        with self._lock:
+            breaker = self._breakers.get(source)
+            if breaker is None:
+                breaker = self._breakers[source] = CircuitBreaker(source, self.failure_threshold, self.cooldown)
+            return breaker
+
+    def available(self, paper_key, source):
+        """
+        判断是否值得对该论文尝试该下载源（不改变熔断状态）
+
+        Args:
+            paper_key (str): 论文键
+            source (str): 下载源名称
+
+        Returns:
+            bool: 值得尝试返回True
+        """
+        if (paper_key, source) in self.negative_cache or not self.breaker(source).available():
+            with self._lock:
+                self.skipped += 1
+            return False
+        return True
+
+    def acquire(self, paper_key, source):
+        """
+        申请对该论文尝试该下载源
+
+        Args:
+            paper_key (str): 论文键
+            source (str): 下载源名称
+
+        Returns:
+            bool: 放行返回True
+        """
+        if (paper_key, source) in self.negative_cache or not self.breaker(source).allow():
+            with self._lock:
+                self.skipped += 1
+            return False
+        return True
+
+    def record(self, paper_key, source, success, source_error=False):
+        """
+        记录一次尝试的结果
+
+        Args:
+            paper_key (str): 论文键
+            source (str): 下载源名称
+            success (bool): 是否得到有效PDF
+            source_error (bool): 是否出现网络错误、限流、验证码等下载源本身的故障
+        """
+        breaker = self.breaker(source)
+        if success:
+            breaker.record_success()
+            return
+        self.negative_cache.add((paper_key, source))
+        if source_error:
+            breaker.record_failure()
+        else:
+            breaker.release_probe()
+
+    def report(self):
+        """
+        获取各下载源的健康状况
+
+        Returns:
+            dict: 下载源 -> 状态、连续失败次数；以及负缓存大小和跳过次数
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {
+            "sources": {b.name: {"state": b.state, "consecutive_failures": b.consecutive_failures}
+                        for b in breakers},
+            "negative_cache_size": len(self.negative_cache),
+            "skipped": self.skipped,
+        }
+
+
+source_health = SourceHealth(failure_threshold=settings.SOURCE_FAILURE_THRESHOLD,
+                             cooldown=settings.SOURCE_COOLDOWN,
+                             negative_ttl=settings.NEGATIVE_CACHE_TTL,
+                             negative_size=settings.NEGATIVE_CACHE_SIZE)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/10 10:05
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：下载源统计与自适应排序。
+# 按(下载源, DOI前缀)记录成功率和耗时中位数，按期望成功耗时（耗时中位数 / 成功率）从小到大排列下载源。
+# 统计数据定期写入JSON文件，重启后继续使用。
+#
+# 查看: python -m app.utils.source_stats report
+
+import argparse
+import atexit
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+from app.core.config import OUTPUT_PATH, settings
+from app.utils.pdf_store import paper_store_key
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+# 每个(下载源, 前缀)保留的耗时样本数
+LATENCY_SAMPLES = 50
+
+# 先验：相当于已观察到1次成功、1次失败，耗时为PRIOR_LATENCY秒，避免新组合被永久排到末尾
+PRIOR_SUCCESSES = 1
+PRIOR_ATTEMPTS = 2
+PRIOR_LATENCY = 5.0
+
+
+def doi_prefix(doi):
+    """
+    获取统计用的DOI前缀：arXiv论文统一为"arxiv"，其余为DOI注册者前缀（如"10.1088"）
+
+    Args:
+        doi (str): DOI或arXiv ID
+
+    Returns:
+        str: 前缀
+    """
+    key = paper_store_key(doi)
+    if key is None:
+        return "unknown"
+    if key.startswith("arxiv:"):
+        return "arxiv"
+    return key[len("doi:"):].split("/", 1)[0]
+
+
+class _Entry:
+    """单个(下载源, 前缀)的统计"""
+
+    def __init__(self, attempts=0, successes=0, latencies=()):
+        self.attempts = attempts
+        self.successes = successes
+        self.latencies = deque(latencies, maxlen=LATENCY_SAMPLES)
+
+    def to_dict(self):
+        return {"attempts": self.attempts, "successes": self.successes, "latencies": list(self.latencies)}
+
+
+class SourceStats:
+    """下载源成功率与耗时统计"""
+
+    def __init__(self, path, save_interval=30):
+        self.path = path
+        self.save_interval = save_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        # 保存由单个线程完成，其余线程发现正在保存时直接跳过
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = time.time()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for source, prefixes in data.items():
+                for prefix, entry in prefixes.items():
+                    self._entries[(source, prefix)] = _Entry(entry["attempts"], entry["successes"],
+                                                             entry["latencies"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"下载源统计文件损坏，重新开始统计: {e}")
+
+    def save(self):
+        """把统计数据原子写入文件"""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                data = {}
+                for (source, prefix), entry in self._entries.items():
+                    data.setdefault(source, {})[prefix] = entry.to_dict()
+                self._dirty = False
+                self._last_save = time.time()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def flush(self):
+        """有未保存的数据时写入文件"""
+        if self._dirty:
+            self.save()
+
+    def record(self, source, prefix, success, latency):
+        """
+        记录一次下载尝试
+
+        Args:
+            source (str): 下载源名称
+            prefix (str): DOI前缀
+            success (bool): 是否得到有效PDF
+            latency (float): 耗时（秒）
+        """
+        with self._lock:
+            entry = self._entries.get((source, prefix))
+            if entry is None:
+                entry = self._entries[(source, prefix)] = _Entry()
+            entry.attempts += 1
+            entry.successes += int(success)
+            entry.latencies.append(round(latency, 3))
+            self._dirty = True
+            due = time.time() - self._last_save >= self.save_interval
+
+        # 已有线程在保存时不再排队重复保存，本次数据留待下次保存或退出时写入
+        if due and not self._save_lock.locked():
+            try:
+                self.save()
+            except OSError as e:
+                logger.error(f"保存下载源统计失败: {e}")
+
+    def _estimate(self, source, prefix):
+        """返回(成功率, 耗时中位数)；该前缀样本不足时合并该下载源的全部样本"""
+        entry = self._entries.get((source, prefix))
+        if entry is None or not entry.latencies:
+            entries = [e for (s, _), e in self._entries.items() if s == source and e.latencies]
+            if not entries:
+                return PRIOR_SUCCESSES / PRIOR_ATTEMPTS, PRIOR_LATENCY
+            attempts = sum(e.attempts for e in entries)
+            successes = sum(e.successes for e in entries)
+            latencies = [latency for e in entries for latency in e.latencies]
+        else:
+            attempts, successes, latencies = entry.attempts, entry.successes, entry.latencies
+        success_rate = (successes + PRIOR_SUCCESSES) / (attempts + PRIOR_ATTEMPTS)
+        return success_rate, statistics.median(latencies)
+
+    def expected_time(self, source, prefix):
+        """
+        估计从该下载源拿到PDF的期望耗时
+
+        Args:
+            source (str): 下载源名称
+            prefix (str): DOI前缀
+
+        Returns:
+            float: 耗时中位数 / 成功率
+        """
+        with self._lock:
+            success_rate, latency = self._estimate(source, prefix)
+        return latency / success_rate
+
+    def order(self, download_methods, prefix):
+        """
+        按期望耗时从小到大排列下载源，期望耗时相同则保持原有顺序
+
+        Args:
+            download_methods (list): [(下载源名称, 下载函数)]
+            prefix (str): DOI前缀
+
+        Returns:
+            list: 重新排序后的列表
+        """
+        return sorted(download_methods, key=lambda method: self.expected_time(method[0], prefix))
+
+    def report(self):
+        """
+        获取当前的统计报表
+
+        Returns:
+            list: 每个(下载源, 前缀)的尝试次数、成功率、耗时中位数和期望耗时，按前缀和期望耗时排序
+        """
+        with self._lock:
+            rows = []
+            for (source, prefix), entry in self._entries.items():
+                success_rate, latency = self._estimate(source, prefix)
+                rows.append({
+                    "source": source,
+                    "prefix": prefix,
+                    "attempts": entry.attempts,
+                    "success_rate": entry.successes / entry.attempts if entry.attempts else 0.0,
+                    "median_latency": latency,
+                    "expected_time": latency / success_rate,
+                })
+        return sorted(rows, key=lambda row: (row["prefix"], row["expected_time"]))
+
+
+source_stats = SourceStats(settings.SOURCE_STATS_PATH or os.path.join(OUTPUT_PATH, "source_stats.json"))
+atexit.register(source_stats.flush)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下载源统计")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("report", help="输出各下载源的成功率与耗时")
+    parser.parse_args()
+
+    print(f"{'prefix':<16}{'source':<16}{'attempts':>10}{'success':>10}{'median(s)':>12}{'expected(s)':>13}")
+    for row in source_stats.report():
+        print(f"{row['prefix']:<16}{row['source']:<16}{row['attempts']:>10}{row['success_rate']:>10.1%}"
+              f"{row['median_latency']:>12.2f}{row['expected_time']:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/18 09:30
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：论文压缩结果缓存。
+# 键为 (论文键, 压缩提示版本, 模型)，论文键即规范化的arXiv ID/DOI；提示模板或模型变化后旧结果自然不再命中。
+# 按大小做LRU淘汰，并按写入时间过期（SUMMARY_CACHE_TTL）。
+#
+# 统计: python -m app.utils.summary_cache stats
+# 淘汰: python -m app.utils.summary_cache evict --max-bytes 500000000 --ttl 2592000
+# 预热: python -m app.utils.summary_cache warm dois.txt --topic warmup
+#       dois.txt 每行一篇论文：DOI或arXiv ID，可用制表符分隔追加标题
+
+import logging
+import os
+import threading
+
+from app.core.config import OUTPUT_PATH, settings
+from app.utils.compression import COMPRESSION_MODEL, compression_prompt_version
+from app.utils.disk_cache import DiskCache
+from app.utils.object_store import build_cli, run_cli
+from app.utils.pdf_store import paper_store_key
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    """
+    获取全局压缩结果缓存，未启用时返回None
+
+    Returns:
+        DiskCache: 缓存实例
+    """
+    global _cache
+    if not settings.SUMMARY_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            root = settings.SUMMARY_CACHE_PATH or os.path.join(OUTPUT_PATH, "summary_cache")
+            _cache = DiskCache(root, max_bytes=settings.SUMMARY_CACHE_MAX_BYTES, ttl=settings.SUMMARY_CACHE_TTL)
+        return _cache
+
+
+def summary_key(doi, model=COMPRESSION_MODEL):
+    """
+    生成压缩结果的缓存键
+
+    Args:
+        doi (str): DOI或arXiv ID
+        model (str): 压缩所用模型
+
+    Returns:
+        str: 缓存键，无法识别论文时返回None
+    """
+    paper_key = paper_store_key(doi)
+    if paper_key is None:
+        return None
+    return f"{paper_key}|{compression_prompt_version()}|{model}"
+
+
+def load_summary(doi):
+    """
+    读取已缓存的压缩结果
+
+    Args:
+        doi (str): DOI或arXiv ID
+
+    Returns:
+        str: 压缩后的内容，未命中返回None
+    """
+    cache = get_summary_cache()
+    key = summary_key(doi)
+    if cache is None or key is None:
+        return None
+    try:
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning(f"读取压缩结果缓存失败: {e}")
+        return None
+    return data.decode('utf-8') if data is not None else None
+
+
+def has_summary(doi):
+    """
+    判断是否已缓存压缩结果（不计入命中统计）
+
+    Args:
+        doi (str): DOI或arXiv ID
+
+    Returns:
+        bool: 已缓存返回True
+    """
+    cache = get_summary_cache()
+    key = summary_key(doi)
+    return cache is not None and key is not None and cache.contains(key)
+
+
+def save_summary(doi, content):
+    """
+    缓存压缩结果
+
+    Args:
+        doi (str): DOI或arXiv ID
+        content (str): 压缩后的内容
+    """
+    cache = get_summary_cache()
+    key = summary_key(doi)
+    if cache is None or key is None or not content:
+        return
+    try:
+        cache.put(key, content.encode('utf-8'))
+    except Exception as e:
+        logger.warning(f"写入压缩结果缓存失败: {e}")
+
+
+def _read_paper_list(path):
+    """读取预热列表，返回[(doi, title)]"""
+    papers = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            doi, _, title = line.partition('\t')
+            doi = doi.strip()
+            papers.append((doi, title.strip() or doi.replace('/', '_')))
+    return papers
+
+
+def warm(papers, topic, user_id=""):
+    """
+    预先压缩尚未缓存的论文（适合在低峰时段批量执行）
+
+    Args:
+        papers (list): [(doi, title)]
+        topic (str): 下载/转换文件存放的主题目录
+        user_id (str): 用户ID
+
+    Returns:
+        tuple: (已缓存数, 本次新压缩数, 失败数)
+    """
+    from app.utils.tool import paper_compression_pipeline
+
+    missing = [(doi, title) for doi, title in papers if not has_summary(doi)]
+    cached = len(papers) - len(missing)
+    logger.info(f"预热压缩结果: 共 {len(papers)} 篇，已缓存 {cached} 篇，待压缩 {len(missing)} 篇")
+    if not missing:
+        return cached, 0, 0
+
+    results = paper_compression_pipeline(missing, topic, user_id=user_id)
+    warmed = sum(1 for result in results if result)
+    return cached, warmed, len(missing) - warmed
+
+
+def main():
+    parser, subparsers = build_cli("论文压缩结果缓存", evict_help="删除过期条目并按大小上限淘汰", ttl=True)
+    warm_parser = subparsers.add_parser("warm", help="批量预先压缩论文")
+    warm_parser.add_argument("paper_list", help="论文列表文件：每行DOI或arXiv ID，可用制表符分隔追加标题")
+    warm_parser.add_argument("--topic", default="summary_warmup", help="下载/转换文件存放的主题目录")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    cache = get_summary_cache()
+    if cache is None:
+        print("压缩结果缓存未启用（SUMMARY_CACHE_ENABLED=False）")
+        return
+
+    if args.command == "warm":
+        cached, warmed, failed = warm(_read_paper_list(args.paper_list), args.topic)
+        print(f"已缓存 {cached} 篇，本次压缩 {warmed} 篇，失败 {failed} 篇")
+    run_cli(cache, args)
+
+
+if __name__ == "__main__":
+    main()
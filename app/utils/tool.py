@@ -7,17 +7,38 @@
 import os
 import re
 
-from app.core.prompt import get_related_keyword_prompt, paper_compression_prompt, extract_entity_prompt, \
+from app.core.prompt import get_related_keyword_prompt, extract_entity_prompt, \
     extract_tec_entities_prompt, review_mechanism_prompt
 from app.utils.llm_api import call_with_deepseek, call_with_deepseek_jsonout, call_with_qwenmax
-from app.utils.arxiv_api import search_paper
-from app.utils.scholar_download import download_all_pdfs
-from app.utils.pdf_to_md import pdf2md_mineruapi
+from app.utils.arxiv_api import normalize_arxiv_id, search_paper
+from app.utils.paper_rank import rerank_papers
+from app.utils.compression import compress_markdown
+from app.utils.keyword_index import get_keyword_index
+from app.utils.keyword_score import score_keywords
+from app.utils.pipeline import Pipeline, Stage
+from app.utils.summary_cache import load_summary, save_summary
+from app.utils.scholar_download import (arxiv_id_of, download_pdf, prefetch_arxiv_pdf_urls, remember_arxiv_pdf_urls,
+                                        sanitize_folder_name)
+from app.utils.pdf_to_md import pdf2md
 from app.utils.wiki_search import get_description, search
-from app.core.config import OUTPUT_PATH, graph
+from app.core.config import OUTPUT_PATH, settings
+from app.core.graph_backend import get_graph_backend
 import ast
 
 
+def query_keyword_counts(entities):
+    """
+    批量查询关键词在知识图谱中的出现次数
+    
+    Args:
+        entities (list): 关键词列表
+    
+    Returns:
+        dict: 关键词 -> 出现次数，未找到为0
+    """
+    return get_graph_backend().keyword_counts(entities)
+
+
 def SearchKeyWordScore(Keywords):
     """
     计算关键词得分
@@ -30,47 +51,17 @@ def SearchKeyWordScore(Keywords):
     """
     print(f"\033[1;32m | INFO     | calculate Keyword score... \033[0m")
 
-    for index, keyword in enumerate(Keywords):
-        entity = keyword['entity']
-
-        # 定义Cypher查询语句
-        query = f"""
-        MATCH (n:Words)
-        WHERE n.other CONTAINS '\'{entity}\'' OR n.name = '{entity}'
-        RETURN n.count,n
-        ORDER BY n.count DESC
-        LIMIT 1
-        """
-
-        # 执行查询并获取结果
-        nodes = graph.run(query).data()
-
-        if len(nodes) != 0:
-            Keywords[index]['count'] = nodes[0]['n.count']
-        else:
-            Keywords[index]['count'] = 0
-
-    # 计算最小和最大count值
-    min_count = min(item['count'] for item in Keywords)
-    max_count = max(item['count'] for item in Keywords)
-
-    # 权重分配
-    weight_importance = 0.4
-    weight_count = 0.6
-
-    # 计算综合得分
-    for item in Keywords:
-        # 避免除零错误：当所有count值相同时，给予相同的归一化分数
-        if max_count == min_count:
-            normalized_count = 0.5  # 默认归一化分数
-        else:
-            normalized_count = (item['count'] - min_count) / (max_count - min_count)
-        
-        composite_score = (item['importance_score'] * weight_importance) + (normalized_count * weight_count)
-        item['composite_score'] = composite_score
+    # 优先查内存索引，未命中的词（可能是上次刷新后新增的节点）再查图谱后端
+    entities = [keyword['entity'] for keyword in Keywords]
+    index = get_keyword_index()
+    counts, missing = index.lookup(entities) if index is not None else ({}, entities)
+    if missing:
+        counts.update(query_keyword_counts(missing))
+    for keyword in Keywords:
+        keyword['count'] = counts.get(keyword['entity'], 0)
 
-        # 排序并输出结果（可选）
-    sorted_data = sorted(Keywords, key=lambda x: x['composite_score'], reverse=True)
+    # 按综合得分排序（count在列表内归一化，权重见配置KEYWORD_WEIGHT_*）
+    sorted_data = score_keywords(Keywords)
 
     print(f"\033[1;32m | INFO     | calculate Keyword score:OK!\n{sorted_data} \033[0m")
 
@@ -165,9 +156,11 @@ def extract_hypothesis(file, split_section="Hypothesis"):
     return None
 
 
-def paper_compression(doi, title, topic, user_id, task):
+def download_paper_pdf(doi, title, topic, user_id, task):
     """
-    论文压缩处理
+    下载论文PDF（流水线下载阶段）
+    
+    arXiv论文的PDF链接已由paper_compression_pipeline在入队前批量解析，这里不再逐篇查询arXiv API。
     
     Args:
         doi (str): 论文DOI
@@ -177,88 +170,224 @@ def paper_compression(doi, title, topic, user_id, task):
         task: 任务对象
     
     Returns:
-        str: 压缩后的内容路径
+        str: PDF文件路径，失败返回None
     """
-    print(f"\033[1;32m | INFO     | paper compression... \033[0m")
-    
-    # 下载PDF
-    pdf_files = download_all_pdfs([doi], [title], topic, user_id, task)
-    if not pdf_files:
+    topic_path = os.path.join(OUTPUT_PATH, sanitize_folder_name(topic))
+    os.makedirs(topic_path, exist_ok=True)
+    pdf_file = download_pdf(doi, title, topic_path)
+    if not pdf_file:
         print("PDF下载失败")
         return None
+    return pdf_file
+
+
+def convert_paper_pdf(pdf_file, topic):
+    """
+    把论文PDF转换为Markdown（流水线转换阶段）
     
-    # 转换为Markdown
+    Args:
+        pdf_file (str): PDF文件路径
+        topic (str): 主题
+    
+    Returns:
+        str: Markdown文件路径，失败返回None
+    """
     topic_path = os.path.join(OUTPUT_PATH, topic)
-    md_file = pdf2md_mineruapi(pdf_files[0], topic_path)
+    md_file = pdf2md(pdf_file, topic_path)
     if not md_file:
         print("PDF转Markdown失败")
         return None
+    return md_file
+
+
+def load_cached_compression(doi, title, topic):
+    """
+    压缩结果缓存命中时直接写出压缩文件，不再下载、转换和调用LLM
+    
+    Args:
+        doi (str): 论文DOI
+        title (str): 论文标题
+        topic (str): 主题
+    
+    Returns:
+        str: 压缩后的内容路径，未命中返回None
+    """
+    compressed_content = load_summary(doi)
+    if compressed_content is None:
+        return None
+    
+    topic_path = os.path.join(OUTPUT_PATH, topic)
+    os.makedirs(topic_path, exist_ok=True)
+    compressed_file = os.path.join(topic_path, f"{title}_compressed.md")
+    with open(compressed_file, 'w', encoding='utf-8') as f:
+        f.write(compressed_content)
+    print(f"\033[1;32m | INFO     | 压缩结果缓存命中: {title} \033[0m")
+    return compressed_file
+
+
+def compress_paper_markdown(md_file, title, topic, doi=None):
+    """
+    压缩论文Markdown并保存（流水线压缩阶段）
+    
+    Args:
+        md_file (str): Markdown文件路径
+        title (str): 论文标题
+        topic (str): 主题
+        doi (str): 论文DOI，提供时把压缩结果写入缓存
     
+    Returns:
+        str: 压缩后的内容路径，失败返回None
+    """
     # 读取Markdown内容
     content = read_markdown_file(md_file)
     if not content:
         print("读取Markdown文件失败")
         return None
     
-    # 使用LLM压缩内容
-    system_prompt = "You are a helpful assistant for academic paper compression."
-    user_prompt = paper_compression_prompt(content=content)
-    
-    compressed_content = call_with_deepseek(system_prompt=system_prompt, question=user_prompt)
+    # 使用LLM压缩内容，长论文按章节分块并发压缩后合并
+    compressed_content = compress_markdown(content, title=title)
+    if doi:
+        save_summary(doi, compressed_content)
     
     # 保存压缩后的内容
-    compressed_file = os.path.join(topic_path, f"{title}_compressed.md")
+    compressed_file = os.path.join(OUTPUT_PATH, topic, f"{title}_compressed.md")
     with open(compressed_file, 'w', encoding='utf-8') as f:
         f.write(compressed_content)
+    return compressed_file
+
+
+def paper_compression(doi, title, topic, user_id, task):
+    """
+    论文压缩处理
+    
+    Args:
+        doi (str): 论文DOI
+        title (str): 论文标题
+        topic (str): 主题
+        user_id (str): 用户ID
+        task: 任务对象
+    
+    Returns:
+        str: 压缩后的内容路径
+    """
+    print(f"\033[1;32m | INFO     | paper compression... \033[0m")
+    
+    # 已压缩过的论文直接返回
+    compressed_file = load_cached_compression(doi, title, topic)
+    if compressed_file:
+        return compressed_file
+    
+    # 下载PDF
+    pdf_file = download_paper_pdf(doi, title, topic, user_id, task)
+    if not pdf_file:
+        return None
+    
+    # 转换为Markdown
+    md_file = convert_paper_pdf(pdf_file, topic)
+    if not md_file:
+        return None
+    
+    compressed_file = compress_paper_markdown(md_file, title, topic, doi)
+    if not compressed_file:
+        return None
     
     print(f"\033[1;32m | INFO     | paper compression:OK! \033[0m")
     return compressed_file
 
 
-def search_releated_paper(topic, max_paper_num=5, compression=True, user_id="", task=None):
+def paper_compression_pipeline(papers, topic, user_id="", task=None):
+    """
+    以下载→转换→压缩三阶段流水线处理多篇论文，各阶段同时处理不同的论文
+    
+    Args:
+        papers (list): [(doi, title)]
+        topic (str): 主题
+        user_id (str): 用户ID
+        task: 任务对象
+    
+    Returns:
+        list: 与输入顺序一致的压缩后内容路径，失败为None
+    """
+    def download_stage(job):
+        job['pdf_file'] = download_paper_pdf(job['doi'], job['title'], topic, user_id, task)
+        return job if job['pdf_file'] else None
+    
+    def convert_stage(job):
+        job['md_file'] = convert_paper_pdf(job['pdf_file'], topic)
+        return job if job['md_file'] else None
+    
+    def compress_stage(job):
+        return compress_paper_markdown(job['md_file'], job['title'], topic, job['doi'])
+    
+    pipeline = Pipeline([
+        Stage("download", download_stage, workers=settings.PIPELINE_DOWNLOAD_WORKERS,
+              queue_size=settings.PIPELINE_QUEUE_SIZE),
+        Stage("convert", convert_stage, workers=settings.PIPELINE_CONVERT_WORKERS,
+              queue_size=settings.PIPELINE_QUEUE_SIZE),
+        Stage("compress", compress_stage, workers=settings.PIPELINE_COMPRESS_WORKERS,
+              queue_size=settings.PIPELINE_QUEUE_SIZE),
+    ], name="paper compression", report_interval=settings.PIPELINE_REPORT_INTERVAL)
+    
+    # 已压缩过的论文不进入流水线
+    results = [load_cached_compression(doi, title, topic) for doi, title in papers]
+    missing = [i for i, result in enumerate(results) if not result]
+    if missing:
+        # 下载阶段逐篇下载，先把全部arXiv ID的PDF链接批量解析好
+        prefetch_arxiv_pdf_urls([arxiv_id for arxiv_id in (arxiv_id_of(papers[i][0]) for i in missing) if arxiv_id])
+        outputs = pipeline.run({'doi': papers[i][0], 'title': papers[i][1]} for i in missing)
+        for i, output in zip(missing, outputs):
+            results[i] = output
+    return results
+
+
+def search_releated_paper(topic, max_paper_num=5, compression=True, user_id="", task=None, related_keywords=None):
     """
     搜索相关论文
     
+    先按主题超量检索候选论文，再以BM25按主题和相关关键词重排序，
+    只有得分最高的max_paper_num篇进入下载/转换/压缩环节。
+    
     Args:
         topic (str): 搜索主题
         max_paper_num (int): 最大论文数量
         compression (bool): 是否压缩
         user_id (str): 用户ID
         task: 任务对象
+        related_keywords (list): 相关关键词，只用于重排序打分
     
     Returns:
         list: 搜索到的论文信息列表
     """
     print(f"\033[1;32m | INFO     | search related paper... \033[0m")
     
-    # 搜索论文
-    papers = search_paper(topic, max_paper_num)
+    # 按主题超量检索候选论文
+    candidates = search_paper([topic], max_paper_num * settings.RERANK_OVERFETCH)
     
-    if not papers:
+    if not candidates:
         print("未找到相关论文")
         return []
     
-    processed_papers = []
-    
-    for paper in papers:
-        try:
-            doi = paper.get('doi', '')
-            title = paper.get('title', '')
-            
-            if compression and doi and title:
-                # 压缩论文
-                compressed_file = paper_compression(doi, title, topic, user_id, task)
-                if compressed_file:
-                    paper['compressed_file'] = compressed_file
-            
-            processed_papers.append(paper)
+    # 重排序，只保留得分最高的论文
+    papers = rerank_papers(candidates, topic, related_keywords=related_keywords, top_k=max_paper_num,
+                           related_weight=settings.RERANK_RELATED_WEIGHT)
+    
+    # 下载时直接复用检索结果中的arXiv PDF链接
+    remember_arxiv_pdf_urls(papers)
+    
+    if compression:
+        # 没有DOI的arXiv论文以规范化的arXiv ID作为标识，下载时只走arXiv
+        jobs = [(paper, paper.get('doi') or normalize_arxiv_id(paper.get('id')) or '') for paper in papers]
+        jobs = [(paper, doi) for paper, doi in jobs if doi and paper.get('title')]
         
-        except Exception as e:
-            print(f"处理论文时发生错误: {e}")
-            continue
+        # 下载、转换、压缩三个阶段流水线并行，不同论文同时处于不同阶段
+        compressed_files = paper_compression_pipeline([(doi, paper['title']) for paper, doi in jobs],
+                                                      topic, user_id, task)
+        for (paper, _), compressed_file in zip(jobs, compressed_files):
+            if compressed_file:
+                paper['compressed_file'] = compressed_file
     
     print(f"\033[1;32m | INFO     | search related paper:OK! \033[0m")
-    return processed_papers
+    return papers
 
 
 def extract_message(file, split_section):
@@ -360,7 +489,7 @@ def extract_message_review(file_path, split_section):
     }
 
 
-def review_mechanism(topic, draft="", user_id="", task=None):
+def review_mechanism(topic, draft="", user_id="", task=None, related_keywords=None):
     """
     审查机制
     
@@ -369,14 +498,16 @@ def review_mechanism(topic, draft="", user_id="", task=None):
         draft (str): 草稿内容
         user_id (str): 用户ID
         task: 任务对象
+        related_keywords (list): 相关关键词（如extract_message_review的结果），用于候选论文重排序
     
     Returns:
         str: 审查结果
     """
     print(f"\033[1;32m | INFO     | review mechanism... \033[0m")
     
-    # 搜索相关论文
-    related_papers = search_releated_paper(topic, max_paper_num=3, compression=True, user_id=user_id, task=task)
+    # 搜索相关论文，调用方已有的相关关键词参与重排序
+    related_papers = search_releated_paper(topic, max_paper_num=3, compression=True, user_id=user_id, task=task,
+                                           related_keywords=related_keywords)
     
     # 构建审查提示
     papers_info = ""
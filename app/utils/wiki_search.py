@@ -3,13 +3,88 @@
 # @Time : 2024/7/7 14:06
 # @Author : 桐
 # @QQ:1041264242
-# 注意事项：
+# 注意事项：Wikidata/Wikipedia查询。
+# 所有请求复用带连接池的会话，设置超时，网络错误、429和5xx按指数退避重试有限次数（WIKI_MAX_RETRIES）。
+# 批量接口把多个标题/实体ID用 | 拼接进一个请求（Wikipedia简介每次最多20个标题，Wikidata每次最多50个ID），
+# lookup_entities 对整个实体列表只需两次往返：按标题批量获取Wikipedia简介及Wikidata ID，再按ID批量获取实体描述。
 
 import json
+import logging
 import re
 import time
+
 import requests
-from app.core.config import Proxies
+
+from app.core.config import Proxies, settings
+
+# 配置日志
+logger = logging.getLogger(__name__)
+
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+WIKIPEDIA_API = "https://{lang}.wikipedia.org/w/api.php"
+
+# API单次请求的上限：exintro简介最多20个标题，wbgetentities最多50个ID
+WIKI_TITLE_BATCH = 20
+WIKIDATA_BATCH = 50
+
+
+def _build_session():
+    """
+    创建带连接池的requests会话，供所有Wiki请求复用
+
+    Returns:
+        requests.Session: 会话对象
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "AstroInsight/1.0 (research assistant; python-requests)"
+    return session
+
+
+_session = _build_session()
+
+
+def _api_get(url, params, timeout=None, max_retries=None):
+    """
+    调用MediaWiki API，失败时按指数退避重试有限次数
+
+    Args:
+        url (str): API地址
+        params (dict): 请求参数
+        timeout (tuple): (连接超时, 读取超时)秒数，默认读取配置WIKI_TIMEOUT
+        max_retries (int): 重试次数，默认读取配置WIKI_MAX_RETRIES
+
+    Returns:
+        dict: 响应JSON
+
+    Raises:
+        requests.exceptions.RequestException: 重试耗尽或遇到不可重试的HTTP错误
+    """
+    timeout = timeout or settings.WIKI_TIMEOUT
+    max_retries = settings.WIKI_MAX_RETRIES if max_retries is None else max_retries
+
+    for attempt in range(max_retries + 1):
+        try:
+            response = _session.get(url, params=params, timeout=timeout, proxies=Proxies)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            status = getattr(e.response, 'status_code', None)
+            if status is not None and status < 500 and status != 429:
+                raise
+            if attempt >= max_retries:
+                logger.error(f"Wiki请求失败，已尝试 {max_retries + 1} 次: {e}")
+                raise
+            wait_time = min(settings.WIKI_RETRY_BACKOFF * 2 ** attempt, settings.WIKI_RETRY_MAX_WAIT)
+            logger.warning(f"Wiki请求失败 (尝试 {attempt + 1}/{max_retries + 1}): {e}，{wait_time} 秒后重试...")
+            time.sleep(wait_time)
+
+
+def _batches(items, size):
+    items = list(dict.fromkeys(item for item in items if item))
+    return [items[i:i + size] for i in range(0, len(items), size)]
 
 
 # 用于获取Wikipedia上的简介内容
@@ -50,6 +125,63 @@ def get_description(text):
     return descriptions
 
 
+def _query_pages(titles, lang):
+    """
+    批量查询Wikipedia页面的简介和对应的Wikidata实体ID，每个请求最多WIKI_TITLE_BATCH个标题
+
+    Args:
+        titles (list): 文章标题列表
+        lang (str): 语言代码
+
+    Returns:
+        dict: 请求标题 -> 页面数据（extract、pageprops等），不存在的文章不在结果中
+    """
+    results = {}
+    url = WIKIPEDIA_API.format(lang=lang)
+    for batch in _batches(titles, WIKI_TITLE_BATCH):
+        params = {
+            'action': 'query',
+            'format': 'json',
+            'titles': '|'.join(batch),
+            'prop': 'extracts|pageprops',
+            'ppprop': 'wikibase_item',
+            'exintro': True,
+            'explaintext': True,
+            'exlimit': 'max',
+            'converttitles': True,
+            'redirects': True,
+        }
+        data = _api_get(url, params).get('query', {})
+
+        # 请求标题经过规范化/繁简转换/重定向后才是页面标题，反向映射回请求标题
+        final = {title: title for title in batch}
+        for key in ('normalized', 'converted', 'redirects'):
+            renames = {item['from']: item['to'] for item in data.get(key, [])}
+            final = {title: renames.get(current, current) for title, current in final.items()}
+
+        pages = {page.get('title'): page for page in data.get('pages', {}).values()}
+        for title, page_title in final.items():
+            page = pages.get(page_title)
+            if page is not None and 'missing' not in page and 'invalid' not in page:
+                results[title] = page
+    return results
+
+
+def get_wikipedia_intros(titles, lang='en'):
+    """
+    批量获取Wikipedia简介
+
+    Args:
+        titles (list): Wikipedia文章标题列表
+        lang (str): 语言代码
+
+    Returns:
+        dict: 标题 -> 简介（纯文本），不存在的文章不在结果中
+    """
+    return {title: remove_html_tags(page['extract'])
+            for title, page in _query_pages(titles, lang).items() if page.get('extract') is not None}
+
+
 def get_wikipedia_intro(entity_data, lang):
     """
     获取Wikipedia简介
@@ -64,29 +196,68 @@ def get_wikipedia_intro(entity_data, lang):
     wikipedia_intro = ''
     if 'sitelinks' in entity_data and f'{lang}wiki' in entity_data['sitelinks']:
         wikipedia_title = entity_data['sitelinks'][f'{lang}wiki']['title']
-        wikipedia_url = 'https://en.wikipedia.org/w/api.php' if lang == 'en' else 'https://zh.wikipedia.org/w/api.php'
-        wikipedia_params = {
-            'action': 'query',
+        try:
+            wikipedia_intro = get_wikipedia_intros([wikipedia_title], lang).get(wikipedia_title, '')
+        except requests.exceptions.RequestException as e:
+            print(f"获取Wikipedia文章内容错误: {e}")
+    return wikipedia_intro
+
+
+def get_entities(ids, language='en', props='labels|descriptions|aliases|sitelinks'):
+    """
+    批量获取Wikidata实体，每个请求最多WIKIDATA_BATCH个ID
+
+    Args:
+        ids (list): 实体ID列表，如['Q1', 'Q2']
+        language (str): 语言代码
+        props (str): 返回的属性
+
+    Returns:
+        dict: 实体ID -> 实体数据，不存在的实体不在结果中
+    """
+    entities = {}
+    for batch in _batches(ids, WIKIDATA_BATCH):
+        params = {
+            'action': 'wbgetentities',
             'format': 'json',
-            'titles': wikipedia_title,
-            'prop': 'extracts',
-            'exintro': True,
-            'explaintext': True,
-            'converttitles': True
+            'ids': '|'.join(batch),
+            'languages': language,
+            'props': props,
         }
-        while True:
-            try:
-                wikipedia_response = requests.get(wikipedia_url, wikipedia_params, proxies=Proxies)
-                break
-            except requests.exceptions.RequestException as e:
-                print("获取Wikipedia文章内容错误，等待60s后重试...")
-                time.sleep(60)
-
-        wikipedia_data = wikipedia_response.json()
-        page_id = next(iter(wikipedia_data['query']['pages']))
-        wikipedia_intro = wikipedia_data['query']['pages'][page_id]['extract']
-        wikipedia_intro = remove_html_tags(wikipedia_intro)
-    return wikipedia_intro
+        for entity_id, entity in _api_get(WIKIDATA_API, params).get('entities', {}).items():
+            if 'missing' not in entity:
+                entities[entity_id] = entity
+    return entities
+
+
+def lookup_entities(names, lang='en'):
+    """
+    批量查询实体的Wikipedia简介和Wikidata描述，整个列表共两次往返（超过批量上限时按批增加）：
+    先按Wikipedia标题获取简介和对应的Wikidata ID（自动跟随重定向），再批量获取Wikidata实体
+
+    Args:
+        names (list): 实体名称列表（按Wikipedia标题匹配）
+        lang (str): 语言代码
+
+    Returns:
+        dict: 名称 -> {"id", "label", "description", "wikipedia_title", "wikipedia_intro"}，解析不到的名称不在结果中
+    """
+    pages = _query_pages(names, lang)
+    ids = {name: page.get('pageprops', {}).get('wikibase_item') for name, page in pages.items()}
+    entities = get_entities([entity_id for entity_id in ids.values() if entity_id], language=lang,
+                            props='labels|descriptions')
+
+    results = {}
+    for name, page in pages.items():
+        entity = entities.get(ids[name], {})
+        results[name] = {
+            'id': ids[name],
+            'label': entity.get('labels', {}).get(lang, {}).get('value', ''),
+            'description': entity.get('descriptions', {}).get(lang, {}).get('value', ''),
+            'wikipedia_title': page.get('title'),
+            'wikipedia_intro': remove_html_tags(page.get('extract') or ''),
+        }
+    return results
 
 
 def search(query, language='en', limit=3):
@@ -101,23 +272,16 @@ def search(query, language='en', limit=3):
     Returns:
         dict: 搜索结果JSON数据
     """
-    url = "https://www.wikidata.org/w/api.php"
-
     params = {
         'action': 'wbsearchentities',
         'format': 'json',
-        'search': {query},  # 搜索文本
-        'language': {language},  # 查询语言（英文）
+        'search': query,  # 搜索文本
+        'language': language,  # 查询语言（英文）
         'type': 'item',
-        'limit': {limit}  # 返回最大数目
+        'limit': limit  # 返回最大数目
     }
 
-    # 访问
-    get = requests.get(url=url, params=params, proxies=Proxies)
-    # 转为json数据
-    re_json = get.json()
-
-    return re_json
+    return _api_get(WIKIDATA_API, params)
 
 
 def search_detailed(id, language='en'):
@@ -131,19 +295,14 @@ def search_detailed(id, language='en'):
     Returns:
         dict: 实体详细信息JSON数据
     """
-    url = "https://www.wikidata.org/w/api.php"
-
     params = {
-        'ids': {id},  # 实体id,可多个，比如'Q123|Q456'
+        'ids': id,  # 实体id,可多个，比如'Q123|Q456'；多个实体建议使用get_entities批量获取
         'action': 'wbgetentities',
         'format': 'json',
-        'language': {language},
+        'language': language,
     }
 
-    # 访问
-    get = requests.get(url=url, params=params, proxies=Proxies)
-    # 转为json数据
-    re_json = get.json()
+    re_json = _api_get(WIKIDATA_API, params)
 
     print(json.dumps(re_json["entities"][id]["descriptions"]["en"], ensure_ascii=False, indent=2))
 
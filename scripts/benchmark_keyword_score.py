@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/18 15:00
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：对比关键词出现次数的两种查询方式的延迟。
+# 逐个查询：每个关键词一次round trip（SearchKeyWordScore原来的做法）；
+# 批量查询：一次round trip解析全部关键词（GraphBackend.keyword_counts）。
+# 关键词从Words节点中抽取，一半为图中存在的名称，一半为不存在的名称（未命中同样需要查找）。
+# 默认使用配置的GRAPH_BACKEND；指定--csv时改用内存SQLite后端加载该CSV，无需Neo4j即可在本地压测。
+#
+# 用法: python scripts/benchmark_keyword_score.py --sizes 10 100 1000 --repeat 3
+#       python scripts/benchmark_keyword_score.py --csv words.csv
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.graph_backend import SQLiteGraphBackend, get_graph_backend
+
+
+def sample_entities(backend, size):
+    """从Words节点抽取size个关键词，一半存在、一半不存在"""
+    names = [record['name'] for record in backend.words_page(-1, size - size // 2)]
+    return names + [f"__missing_keyword_{i}__" for i in range(size - len(names))]
+
+
+def measure(func, entities, repeat):
+    """返回repeat次调用的耗时中位数（秒）与最后一次的结果"""
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(entities)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词出现次数查询延迟对比")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="关键词数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式的重复次数，取中位数")
+    parser.add_argument("--csv", default=None, help="Words节点CSV，指定时使用内存SQLite后端")
+    args = parser.parse_args()
+
+    if args.csv:
+        backend = SQLiteGraphBackend(":memory:")
+        backend.load_csv(args.csv)
+    else:
+        backend = get_graph_backend()
+
+    def query_per_entity(entities):
+        return {entity: backend.keyword_count(entity) for entity in entities}
+
+    print(f"后端: {type(backend).__name__}")
+    print(f"{'关键词数':>8} {'逐个查询(s)':>12} {'批量查询(s)':>12} {'加速比':>8}  结果一致")
+    for size in args.sizes:
+        entities = sample_entities(backend, size)
+        per_entity, expected = measure(query_per_entity, entities, args.repeat)
+        batched, actual = measure(backend.keyword_counts, entities, args.repeat)
+        speedup = per_entity / batched if batched else float("inf")
+        print(f"{size:>8} {per_entity:>12.3f} {batched:>12.3f} {speedup:>7.1f}x  {expected == actual}")
+
+
+if __name__ == "__main__":
+    main()
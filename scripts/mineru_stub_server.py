@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# @Time : 2025/9/12 16:10
+# @Author : 桐
+# @QQ:1041264242
+# 注意事项：本地MinerU替身服务，实现 /upload、/convert、/status、/download 四个接口，用于联调转换管理器。
+# 每个转换任务在提交后 --delay 秒（可带 --jitter 随机抖动）变为completed，下载得到根据上传文件生成的Markdown。
+#
+# 启动: python scripts/mineru_stub_server.py --port 8765 --delay 5
+# 然后在 mineruapi.xlsx 中填写 api_url=http://127.0.0.1:8765
+
+import argparse
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubState:
+    """替身服务的内存状态"""
+
+    def __init__(self, delay, jitter, fail_rate, zip_results=False):
+        self.delay = delay
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.zip_results = zip_results
+        self.files = {}
+        self.tasks = {}
+        self.status_requests = 0
+        self.lock = threading.Lock()
+
+
+def _make_handler(state):
+    class MineruStubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, data, status=200):
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self):
+            length = int(self.headers.get('Content-Length', 0))
+            return self.rfile.read(length) if length else b''
+
+        def do_POST(self):
+            if self.path == '/upload':
+                body = self._read_body()
+                file_id = uuid.uuid4().hex
+                # multipart内容不做解析，只取其中的文件名用于生成Markdown标题
+                match = re.search(rb'filename="([^"]+)"', body)
+                filename = match.group(1).decode('utf-8', 'replace') if match else file_id
+                with state.lock:
+                    state.files[file_id] = {"filename": filename, "size": len(body)}
+                self._send_json({"file_id": file_id})
+            elif self.path == '/convert':
+                data = json.loads(self._read_body() or b'{}')
+                with state.lock:
+                    if data.get('file_id') not in state.files:
+                        self._send_json({"error": "unknown file_id"}, status=404)
+                        return
+                    task_id = uuid.uuid4().hex
+                    delay = state.delay + random.uniform(0, state.jitter)
+                    state.tasks[task_id] = {
+                        "file_id": data['file_id'],
+                        "ready_at": time.time() + delay,
+                        "failed": random.random() < state.fail_rate,
+                    }
+                self._send_json({"task_id": task_id})
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+        def do_GET(self):
+            parts = self.path.strip('/').split('/')
+            if len(parts) != 2:
+                self._send_json({"error": "not found"}, status=404)
+                return
+            action, task_id = parts
+            task_id = task_id[:-len(".zip")] if task_id.endswith(".zip") else task_id
+            with state.lock:
+                task = state.tasks.get(task_id)
+                if action == 'status':
+                    state.status_requests += 1
+            if task is None:
+                self._send_json({"error": "unknown task_id"}, status=404)
+                return
+
+            if action == 'status':
+                if time.time() < task['ready_at']:
+                    self._send_json({"status": "processing"})
+                elif task['failed']:
+                    self._send_json({"status": "failed"})
+                else:
+                    host = self.headers.get('Host')
+                    suffix = ".zip" if state.zip_results else ""
+                    self._send_json({"status": "completed",
+                                     "download_url": f"http://{host}/download/{task_id}{suffix}"})
+            elif action == 'download':
+                file_info = state.files[task['file_id']]
+                body = (f"# {file_info['filename']}\n\n"
+                        f"Converted by MinerU stub ({file_info['size']} bytes uploaded).\n").encode('utf-8')
+                content_type = 'text/markdown; charset=utf-8'
+                if state.zip_results:
+                    # 与MinerU结果包结构一致：full.md、images/ 以及中间JSON
+                    archive = io.BytesIO()
+                    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+                        zf.writestr('full.md', body + b"\n![](images/fig1.png)\n")
+                        zf.writestr('images/fig1.png', b'\x89PNG\r\n\x1a\n' + b'\0' * 1024)
+                        zf.writestr('layout.json', json.dumps({"pages": []}))
+                    body, content_type = archive.getvalue(), 'application/zip'
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self._send_json({"error": "not found"}, status=404)
+
+    return MineruStubHandler
+
+
+def start_stub_server(port=0, delay=5.0, jitter=0.0, fail_rate=0.0, zip_results=False):
+    """
+    在后台线程启动替身服务
+
+    Args:
+        port (int): 监听端口，0表示随机端口
+        delay (float): 转换任务完成所需秒数
+        jitter (float): 在delay基础上增加的随机秒数上限
+        fail_rate (float): 转换失败的概率
+        zip_results (bool): 是否以ZIP结果包（full.md + images/）返回结果
+
+    Returns:
+        tuple: (server, api_url)，server.stub_state 可查看状态查询次数等信息
+    """
+    state = _StubState(delay, jitter, fail_rate, zip_results)
+    server = ThreadingHTTPServer(('127.0.0.1', port), _make_handler(state))
+    server.daemon_threads = True
+    server.stub_state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地MinerU替身服务")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--delay", type=float, default=5.0, help="转换任务完成所需秒数")
+    parser.add_argument("--jitter", type=float, default=0.0, help="在delay基础上增加的随机秒数上限")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="转换失败的概率")
+    parser.add_argument("--zip", action="store_true", help="以ZIP结果包返回结果")
+    args = parser.parse_args()
+
+    server, api_url = start_stub_server(args.port, args.delay, args.jitter, args.fail_rate, args.zip)
+    print(f"MinerU替身服务已启动: {api_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()